@@ -1,3 +1,4 @@
+# pylint: disable=too-many-lines
 """ 
 This module contains classes and functions to generate markdown files.
 
@@ -7,195 +8,2315 @@ License: MIT License
 Copyrigth (c) 2023 Arttu Mahlakaarto
 """
 
+import asyncio
+import codecs
+import csv
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import mmap
+import operator
 import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from bisect import bisect_right
 
+try:
+    import numpy  # pylint: disable=import-error
+except ImportError:
+    numpy = None  # pylint: disable=invalid-name
 
-class Header:
+# Default number of characters buffered by Document.save before each write
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+def _join_chunks(chunks, buffer_size: int = DEFAULT_BUFFER_SIZE):
+    """Join chunks into pieces of about buffer_size characters.
+
+    Args:
+        chunks (Iterable[str]): Chunks to join
+        buffer_size (int): Number of characters to buffer before each piece
+
+    Yields:
+        str: Joined pieces, in order. Parts that are not strings, such as the
+            _FileRange parts of Document.save, are passed through as they are.
+    """
+    buffer: list[str] = []
+    buffered = 0
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            if buffer:
+                yield "".join(buffer)
+                buffer.clear()
+                buffered = 0
+            yield chunk
+            continue
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= buffer_size:
+            yield "".join(buffer)
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _write_chunks(file_output, chunks, buffer_size: int = DEFAULT_BUFFER_SIZE):
+    """Write chunks to a file, joining them into writes of about buffer_size characters.
+
+    Args:
+        file_output: File object to write to
+        chunks (Iterable[str]): Chunks to write
+        buffer_size (int): Number of characters to buffer before each write
+    """
+    for piece in _join_chunks(chunks, buffer_size):
+        file_output.write(piece)
+
+
+def _file_digest(filename: str) -> str | None:
+    """Return the sha256 hex digest of a file, or None if it is missing."""
+    digest = hashlib.sha256()
+    try:
+        with open(filename, "rb") as file_input:
+            for piece in iter(lambda: file_input.read(DEFAULT_BUFFER_SIZE), b""):
+                digest.update(piece)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _stored_digest(filename: str, sidecar: bool) -> str | None:
+    """Return the digest of the existing file, from its sidecar file if requested."""
+    if sidecar and os.path.exists(filename):
+        try:
+            with open(filename + ".sha256", "r", encoding="utf-8") as sidecar_input:
+                return sidecar_input.read().strip()
+        except FileNotFoundError:
+            pass
+    return _file_digest(filename)
+
+
+class _FileRange:
+    """Byte range of a file, copied into the output without decoding it."""
+
+    __slots__ = ("path", "offset", "length")
+
+    def __init__(self, path: str, offset: int, length: int):
+        self.path = path
+        self.offset = offset
+        self.length = length
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _iter_blocks(self, source):
+        """Read the range from an open file into a reused buffer, block by block."""
+        source.seek(self.offset)
+        buffer = memoryview(bytearray(DEFAULT_BUFFER_SIZE))
+        remaining = self.length
+        while remaining:
+            read = source.readinto(buffer[:min(remaining, DEFAULT_BUFFER_SIZE)])
+            if not read:
+                break
+            remaining -= read
+            yield buffer[:read]
+
+    def copy_to(self, file_output, digest=None):
+        """Copy the range into a binary file.
+
+        Without a digest to update, the bytes are copied by the kernel with
+        os.sendfile where it is available, otherwise through a reused buffer.
+
+        Args:
+            file_output: Binary file to write to
+            digest (hashlib._Hash, optional): Hash to update with the copied bytes
+        """
+        with open(self.path, "rb") as source:
+            if digest is None and hasattr(os, "sendfile"):
+                file_output.flush()
+                offset, remaining = self.offset, self.length
+                while remaining:
+                    sent = os.sendfile(file_output.fileno(), source.fileno(), offset, remaining)
+                    if not sent:
+                        break
+                    offset += sent
+                    remaining -= sent
+                return
+            for block in self._iter_blocks(source):
+                if digest is not None:
+                    digest.update(block)
+                file_output.write(block)
+
+    def iter_text(self):
+        """Decode the range as UTF-8 text, block by block."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        with open(self.path, "rb") as source:
+            for block in self._iter_blocks(source):
+                yield decoder.decode(block)
+        yield decoder.decode(b"", final=True)
+
+
+def _temporary_path(filename: str) -> str:
+    """Return a unique temporary path in the directory of filename."""
+    directory, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(directory, f".{name}.{os.urandom(4).hex()}.tmp")
+
+
+def _save_atomic(
+    filename: str,
+    chunks,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    sidecar: bool = False,
+    skip_unchanged: bool = True,
+) -> bool:
+    """Write chunks to a file atomically, unless the file already has the same content.
+
+    The chunks are written to a temporary file next to the target while their hash
+    is computed. The temporary file then replaces the target with os.replace, or is
+    removed if the target already has the same hash, so readers never see a
+    half-written file and unchanged files are never touched.
+
+    Args:
+        filename (str): File to write to
+        chunks (Iterable[str | _FileRange]): Chunks to write, file ranges are copied
+            without being decoded
+        buffer_size (int): Number of characters to buffer before each write
+        sidecar (bool): Read and store the hash in a filename.sha256 file instead of
+            hashing the existing file
+        skip_unchanged (bool): Compare the hashes at all, without it file ranges are
+            copied with os.sendfile
+
+    Returns:
+        bool: Whether the file was written
+    """
+    temporary = _temporary_path(filename)
+    digest = hashlib.sha256() if skip_unchanged or sidecar else None
+    try:
+        with open(temporary, "xb") as file_output:
+            for piece in _join_chunks(chunks, buffer_size):
+                if not isinstance(piece, str):
+                    piece.copy_to(file_output, digest)
+                    continue
+                if os.linesep != "\n":
+                    piece = piece.replace("\n", os.linesep)
+                data = piece.encode("utf-8")
+                if digest is not None:
+                    digest.update(data)
+                file_output.write(data)
+        new_digest = None if digest is None else digest.hexdigest()
+        if skip_unchanged and _stored_digest(filename, sidecar) == new_digest:
+            os.remove(temporary)
+            return False
+        if os.path.exists(filename):
+            os.chmod(temporary, os.stat(filename).st_mode & 0o7777)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    if sidecar:
+        with open(filename + ".sha256", "w", encoding="utf-8") as sidecar_output:
+            sidecar_output.write(f"{new_digest}\n")
+    return True
+
+
+class _Tracked:
+    """Attribute that invalidates the render cache of its owner when it is set."""
+
+    def __set_name__(self, owner, name):
+        self.name = "_" + name  # pylint: disable=attribute-defined-outside-init
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return getattr(obj, self.name)
+
+    def __set__(self, obj, value):
+        setattr(obj, self.name, value)
+        obj._touch()  # pylint: disable=protected-access
+
+
+class Node:
+    """Base class of the elements of a markdown document.
+
+    Nodes render into a shared writer, any object with a write(str) method such
+    as an io.StringIO or an open text file, so nested elements write their output
+    straight into the target instead of into the string of their parent.
+    """
+
+    __slots__ = ()
+
+    def iter_render(self):
+        """Render the node one chunk at a time.
+
+        Yields:
+            str: Chunks of the node in order.
+        """
+        yield str(self)
+
+    def _iter_parts(self):
+        """Render the node for Document.save, like iter_render, but file-backed
+        content may be yielded as _FileRange parts instead of strings."""
+        return self.iter_render()
+
+    def render_into(self, writer):
+        """Write the rendered node into a writer.
+
+        Args:
+            writer: Object with a write(str) method, such as io.StringIO or a text file
+        """
+        write = writer.write
+        for chunk in self.iter_render():
+            write(chunk)
+
+
+class _Renderable(Node):
+    """Base class for elements that cache their rendered output.
+
+    Every mutation bumps a version counter, and the cached output is only reused
+    while the stamp (the versions of the element and its children) is unchanged.
+    """
+
+    __slots__ = ("_version", "_cache", "_cache_stamp")
+
+    def __init__(self):
+        self._version = 0
+        self._cache: str | None = None
+        self._cache_stamp = None
+
+    def invalidate(self):
+        """Drop the cached output.
+
+        Called automatically by the mutating methods and attribute setters, call it
+        manually after changing a mutable attribute (such as a list) in place.
+        """
+        self._touch()
+
+    def _touch(self):
+        """Drop the cached output after a change the element keeps track of itself."""
+        self._version += 1
+        self._cache = None
+
+    def _stamp(self):
+        """Return a value that changes whenever the rendered output may change."""
+        return self._version
+
+    def _iter_chunks(self):
+        """Render the element from scratch, one chunk at a time."""
+        raise NotImplementedError
+
+    def _cached(self) -> str | None:
+        """Return the cached output if it is still valid."""
+        if self._cache is not None and self._cache_stamp == self._stamp():
+            return self._cache
+        return None
+
+    def iter_render(self):
+        """Render the element one chunk at a time.
+
+        Yields:
+            str: The cached output if it is valid, otherwise freshly rendered chunks.
+        """
+        cached = self._cached()
+        if cached is not None:
+            yield cached
+        else:
+            yield from self._iter_chunks()
+
+    async def arender(self, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """Render the element asynchronously, in pieces of about buffer_size characters.
+
+        Control returns to the event loop after every piece, so large documents and
+        tables are rendered between other tasks instead of blocking the loop.
+
+        Args:
+            buffer_size (int): Number of characters to render before each piece
+
+        Yields:
+            str: Pieces of the element in order.
+        """
+        for piece in _join_chunks(self.iter_render(), buffer_size):
+            yield piece
+            await asyncio.sleep(0)
+
+    def render(self) -> str:
+        """Render the element to a string, reusing the cached output when possible."""
+        cached = self._cached()
+        if cached is None:
+            stamp = self._stamp()
+            cached = "".join(self._iter_chunks())
+            self._cache = cached
+            self._cache_stamp = stamp
+        return cached
+
+
+class Header(_Renderable):
     """Class to generate markdown headers."""
 
+    __slots__ = ("_text", "_level")
+
     def __init__(self, text: str, level: int = 1):
         """Create a header object.
 
-        Args:
-            text (str): Text for the header
+        Args:
+            text (str): Text for the header
+
+        Keyword Args:
+            level (int): Level of the header
+        """
+        super().__init__()
+        self.text = text
+        self.level = level
+
+    text = _Tracked()
+    level = _Tracked()
+
+    def _iter_chunks(self):
+        yield "#" * self.level + " " + self.text
+
+    def __str__(self):
+        """Return the header as a string."""
+        return "#" * self.level + " " + self.text
+
+    def __repr__(self):
+        """Return the header as a string."""
+        return "#" * self.level + " " + self.text
+
+class _Column:
+    """A single compact column of a columnar table.
+
+    Integers and floats are kept in typed arrays, anything else in a plain list.
+    Missing cells are stored sparsely: rows added before the column existed are
+    covered by ``start`` and other gaps are recorded in the ``missing`` set.
+    Columns loaded by Table.from_arrays share the buffer they were given, which is
+    only copied when the column is changed.
+    """
+
+    __slots__ = ("start", "values", "missing", "shared")
+
+    def __init__(self, start: int = 0):
+        self.start = start
+        self.values: array | list | None = None
+        self.missing: set[int] = set()
+        self.shared = False
+
+    def _own(self):
+        """Copy a shared buffer before the column is changed."""
+        values = self.values
+        if isinstance(values, array) and values.typecode in ("q", "d"):
+            self.values = array(values.typecode, values)
+        elif hasattr(values, "tolist"):
+            self.values = values.tolist()  # type: ignore
+        else:
+            self.values = list(values)  # type: ignore
+        self.shared = False
+
+    @staticmethod
+    def _typecode(value) -> str | None:
+        """Return the array typecode that can hold value, or None."""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return "q" if -(2**63) <= value < 2**63 else None
+        if isinstance(value, float):
+            return "d"
+        return None
+
+    def _fits(self, value) -> bool:
+        """Check if value can be stored in the current values container."""
+        if isinstance(self.values, list):
+            return True
+        return self._typecode(value) == self.values.typecode  # type: ignore
+
+    def append(self, value, index: int):
+        """Append value as the cell for row index."""
+        if self.shared:
+            self._own()
+        if isinstance(value, str) and not value:
+            if self.values is None:
+                self.values = array("q")
+            self.values.append(0 if isinstance(self.values, array) else "")
+            self.missing.add(index)
+            return
+        if self.values is None:
+            typecode = self._typecode(value)
+            self.values = array(typecode) if typecode else []
+        elif not self._fits(value):
+            self.values = list(self.values)
+        self.values.append(value)
+
+    def get(self, index: int):
+        """Return the cell for row index, or "" if it is missing."""
+        if index < self.start or (self.missing and index in self.missing):
+            return ""
+        return self.values[index - self.start]  # type: ignore
+
+    def set(self, index: int, value):
+        """Replace the cell for row index."""
+        if self.shared:
+            self._own()
+        if index < self.start:
+            # Back-fill the rows that existed before the column was added.
+            self.missing.update(range(index + 1, self.start))
+            filler = [""] * (self.start - index)
+            self.values = filler + list(self.values or [])
+            self.start = index
+        if not self._fits(value):
+            self.values = list(self.values)  # type: ignore
+        self.values[index - self.start] = value  # type: ignore
+        self.missing.discard(index)
+
+
+def _call(function, argument):
+    """Call function with a single argument, used to map formatters over cells."""
+    return function(argument)
+
+
+def _missing_cell(index: int) -> str:  # pylint: disable=unused-argument
+    """Cell getter for a header that has no column."""
+    return ""
+
+
+# Sort keys for bool-like columns, missing cells sort first
+_BOOL_SORT_KEYS = {True: 1, False: 0, "True": 1, "true": 1, "False": 0, "false": 0, "": -1}
+_MISSING_NUMBER = float("-inf")
+
+
+class _ColumnType:
+    """Incrementally inferred type of a column, used to pick its sort key.
+
+    Each flag stays True only while every value seen so far qualifies, so a column
+    narrows from bool-like to int, float and finally str as values are added.
+    """
+
+    __slots__ = ("bool_like", "integer", "numeric")
+
+    def __init__(self):
+        self.bool_like = True
+        self.integer = True
+        self.numeric = True
+
+    def update(self, value):
+        """Narrow the type to also cover value."""
+        if not (self.bool_like or self.numeric) or (isinstance(value, str) and not value):
+            # Already a str column, or a missing cell which fits any type
+            return
+        if isinstance(value, (bool, int, float)):
+            bool_like = value in (0, 1)
+            integer = isinstance(value, int)
+            numeric = not (isinstance(value, float) and math.isnan(value))
+        elif isinstance(value, str):
+            bool_like = value in ("True", "true", "False", "false")
+            integer = numeric = False
+            if not bool_like:
+                try:
+                    int(value)
+                    integer = numeric = True
+                except ValueError:
+                    try:
+                        numeric = not math.isnan(float(value))
+                    except ValueError:
+                        pass
+        else:
+            bool_like = integer = numeric = False
+        self.bool_like = self.bool_like and bool_like
+        self.integer = self.integer and integer
+        self.numeric = self.numeric and numeric
+
+    @property
+    def kind(self) -> str:
+        """Return the inferred type, one of "bool", "int", "float" or "str"."""
+        if self.bool_like:
+            return "bool"
+        if self.integer:
+            return "int"
+        if self.numeric:
+            return "float"
+        return "str"
+
+
+def _buffer_column_type(values) -> _ColumnType:
+    """Infer the type of a column buffer, from its dtype for NumPy arrays."""
+    column_type = _ColumnType()
+    dtype = getattr(values, "dtype", None)
+    if dtype is not None and dtype.kind in "biuf":
+        column_type.integer = dtype.kind != "f"
+        column_type.numeric = dtype.kind != "f" or not numpy.isnan(values).any()
+        column_type.bool_like = dtype.kind == "b" or bool(((values == 0) | (values == 1)).all())
+        return column_type
+    for value in values.tolist() if hasattr(values, "tolist") else values:
+        column_type.update(value)
+    return column_type
+
+
+class _Descending:
+    """Wrapper that inverts the ordering of a str sort key."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: str):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other) -> bool:
+        return self.value == other.value
+
+
+def _to_bool(value) -> bool | str:
+    """Convert a bool-like cell to a real bool, missing cells are kept as they are."""
+    if isinstance(value, bool) or value == "":
+        return value
+    return _BOOL_SORT_KEYS[value] == 1
+
+
+class _Aggregate:
+    """Running aggregates of a column, updated in O(1) for every added row."""
+
+    __slots__ = ("count", "numbers", "total", "minimum", "maximum")
+
+    FUNCTIONS = ("sum", "count", "min", "max", "mean")
+
+    def __init__(self):
+        self.count = 0
+        self.numbers = 0
+        self.total: int | float = 0
+        self.minimum: int | float | None = None
+        self.maximum: int | float | None = None
+
+    def update(self, value):
+        """Add a cell to the aggregates, missing and non numeric cells are only counted."""
+        if isinstance(value, str) and not value:
+            return
+        self.count += 1
+        if isinstance(value, str):
+            try:
+                value = int(value)
+            except ValueError:
+                try:
+                    value = float(value)
+                except ValueError:
+                    return
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            return
+        self.numbers += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def result(self, function: str) -> int | float | str:
+        """Return the value of an aggregate function, "" if it is undefined."""
+        if function == "count":
+            return self.count
+        if not self.numbers:
+            return ""
+        if function == "min":
+            return self.minimum  # type: ignore
+        if function == "max":
+            return self.maximum  # type: ignore
+        if function == "mean":
+            return self.total / self.numbers
+        return self.total
+
+
+def _int_sort_key(value) -> int | float:
+    """Sort key for int columns, missing cells sort first."""
+    return _MISSING_NUMBER if isinstance(value, str) and not value else int(value)
+
+
+def _float_sort_key(value) -> float:
+    """Sort key for float columns, missing cells sort first."""
+    return _MISSING_NUMBER if isinstance(value, str) and not value else float(value)
+
+
+_SORT_KEY_CONVERTERS = {
+    "bool": _BOOL_SORT_KEYS.__getitem__,
+    "int": _int_sort_key,
+    "float": _float_sort_key,
+    "str": str,
+}
+
+
+def _compose(outer, inner):
+    """Return a function that calls outer on the result of inner."""
+    return lambda value: outer(inner(value))
+
+
+# Translation table that escapes the characters that break a markdown table cell
+_ESCAPE_TABLE = str.maketrans({"|": "\\|", "\n": "<br>", "\r": ""})
+_escape_cell = operator.methodcaller("translate", _ESCAPE_TABLE)
+
+
+# Characters that take up no space in a terminal, such as joiners and variation selectors
+_ZERO_WIDTH = frozenset("\u200b\u200c\u200d\ufe0e\ufe0f")
+
+
+def _display_width(text: str) -> int:
+    """Return the number of terminal columns text takes up.
+
+    Wide characters, such as CJK characters and most emoji, take up two columns,
+    combining and zero-width characters none.
+    """
+    if text.isascii():
+        return len(text)
+    width = 0
+    for character in text:
+        if character in _ZERO_WIDTH or unicodedata.combining(character):
+            continue
+        width += 2 if unicodedata.east_asian_width(character) in ("W", "F") else 1
+    return width
+
+
+def _padder(width: int):
+    """Return a function that pads text with spaces to the given display width."""
+    return lambda text: text + " " * (width - _display_width(text))
+
+
+def _value_formatter(spec: dict):
+    """Compile the precision, thousands and date_format of a formatter spec.
+
+    Args:
+        spec (dict): Formatter spec of a column, see Table
+
+    Returns:
+        Callable[[Any], str]: Function that turns a cell into text, cells that the
+            spec does not apply to (such as text in a numeric column) are left as is
+    """
+    precision = spec.get("precision")
+    thousands = spec.get("thousands")
+    date_format = spec.get("date_format")
+    formatter = str
+    if precision is not None or thousands:
+        number_format = (
+            f"{{:{',' if thousands else ''}{'' if precision is None else f'.{precision}f'}}}"
+        ).format
+        if isinstance(thousands, str) and thousands != ",":
+            number_format = _compose(
+                operator.methodcaller("replace", ",", thousands), number_format
+            )
+
+        def format_number(cell):
+            if isinstance(cell, bool):
+                return str(cell)
+            try:
+                return number_format(cell)
+            except (TypeError, ValueError):
+                return str(cell)
+
+        formatter = format_number
+    if date_format is not None:
+        format_value = formatter
+
+        def format_date(cell):
+            try:
+                return cell.strftime(date_format)
+            except AttributeError:
+                return format_value(cell)
+
+        formatter = format_date
+    return formatter
+
+
+class _RowStore:
+    """Row storage for a Table, one dict per row."""
+
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows: list[dict[str, str | int | float | bool]] = []
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def append(self, row: dict[str, str | int | float | bool]):
+        """Append a row dict and return its handle."""
+        self.rows.append(row)
+        return row
+
+    def move_last(self, position: int):
+        """Move the last row to position in the table order."""
+        self.rows.insert(position, self.rows.pop())
+
+    def add_column(self, header: str):  # pylint: disable=unused-argument
+        """Register a new column, rows are dicts so nothing needs to be done."""
+
+    def records(self):
+        """Return the row handles in table order."""
+        return self.rows
+
+    @staticmethod
+    def get(record, header: str):
+        """Return a single cell."""
+        return record.get(header, "")
+
+    @staticmethod
+    def getter(header: str):
+        """Return a function that reads the header cell of a row handle."""
+        return lambda record: record.get(header, "")
+
+    def convert(self, header: str, function):
+        """Replace every cell of a column with function(cell)."""
+        for row in self.rows:
+            value = row.get(header, "")
+            converted = function(value)
+            if converted is not value:
+                row[header] = converted
+
+    @staticmethod
+    def as_dict(record) -> dict:
+        """Return the row as a dict."""
+        return record
+
+    def sort(self, key, reverse: bool = False):
+        """Sort the rows in place, key is called with each row handle."""
+        # sorted() leaves the rows untouched if a comparison raises
+        self.rows[:] = sorted(self.rows, key=key, reverse=reverse)
+
+    def iter_cells(self, headers: list[str], records=None):
+        """Yield the cells of each row (or of the given row handles), in header order."""
+        for row in self.rows if records is None else records:
+            yield [row.get(header, "") for header in headers]
+
+
+class _KeyedStore:
+    """Row storage for a Table with a key column.
+
+    Rows are kept in a list in table order next to a dict of rows by key, so
+    lookups, updates and deletes by key are O(1) and rows can be inserted at a
+    sorted position as cheaply as in an unkeyed table. Deleted rows are only
+    dropped from the list when the rows are next read in order.
+    """
+
+    __slots__ = ("key", "index", "rows", "deleted")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.index: dict = {}
+        self.rows: list[dict[str, str | int | float | bool]] = []
+        self.deleted = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def append(self, row: dict[str, str | int | float | bool]):
+        """Append a row dict and return its handle."""
+        self.index[row.get(self.key, "")] = row
+        self.rows.append(row)
+        return row
+
+    def add_column(self, header: str):  # pylint: disable=unused-argument
+        """Register a new column, rows are dicts so nothing needs to be done."""
+
+    def find(self, key):
+        """Return the row with key, or None."""
+        return self.index.get(key)
+
+    def delete(self, key):
+        """Delete the row with key."""
+        del self.index[key]
+        self.deleted += 1
+
+    def _compact(self):
+        """Drop the deleted rows from the table order."""
+        if self.deleted:
+            self.rows = list(self.live(self.rows))
+            self.deleted = 0
+
+    def _reindex(self, rows):
+        """Rebuild the index from rows in table order."""
+        self.index = {}
+        self.rows = []
+        self.deleted = 0
+        for row in rows:
+            self.append(row)
+        self.deleted = len(self.rows) - len(self.index)
+
+    def live(self, records):
+        """Yield the row handles of records that have not been deleted."""
+        index, key = self.index, self.key
+        return (row for row in records if index.get(row.get(key, "")) is row)
+
+    def move_last(self, position: int):
+        """Move the last row to position in the table order."""
+        self._compact()
+        self.rows.insert(position, self.rows.pop())
+
+    def records(self):
+        """Return the row handles in table order."""
+        self._compact()
+        return self.rows
+
+    get = staticmethod(_RowStore.get)
+    getter = staticmethod(_RowStore.getter)
+    as_dict = staticmethod(_RowStore.as_dict)
+
+    def convert(self, header: str, function):
+        """Replace every cell of a column with function(cell)."""
+        for row in self.records():
+            value = row.get(header, "")
+            converted = function(value)
+            if converted is not value:
+                row[header] = converted
+        if header == self.key:
+            self._reindex(self.rows)
+
+    def sort(self, key, reverse: bool = False):
+        """Sort the rows, key is called with each row handle."""
+        self._compact()
+        self.rows = sorted(self.rows, key=key, reverse=reverse)
+
+    def iter_cells(self, headers: list[str], records=None):
+        """Yield the cells of each row (or of the given row handles), in header order."""
+        for row in self.records() if records is None else records:
+            yield [row.get(header, "") for header in headers]
+
+
+class _ColumnStore:
+    """Columnar storage for a Table, one compact _Column per header.
+
+    Rows are addressed by their insertion index, and the table order is kept in a
+    separate index array so sorting never moves the column data.
+    """
+
+    __slots__ = ("columns", "order", "length")
+
+    def __init__(self, headers: list[str]):
+        self.columns: dict[str, _Column] = {header: _Column() for header in headers}
+        self.order = array("q")
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, row: dict[str, str | int | float | bool]):
+        """Append a row and return its handle, cells not in row are stored as missing."""
+        index = self.length
+        for header, column in self.columns.items():
+            column.append(row.get(header, ""), index)
+        self.order.append(index)
+        self.length += 1
+        return index
+
+    def append_values(self, columns: list[_Column], values):
+        """Append a row given as one value per column, without building a dict."""
+        index = self.length
+        for column, value in zip(columns, values):
+            column.append(value, index)
+        self.order.append(index)
+        self.length += 1
+
+    def move_last(self, position: int):
+        """Move the last row to position in the table order."""
+        self.order.insert(position, self.order.pop())
+
+    def add_column(self, header: str):
+        """Add an empty column, the existing rows are missing the new cell."""
+        self.columns[header] = _Column(self.length)
+
+    def records(self):
+        """Return the row handles in table order."""
+        return self.order
+
+    def get(self, record: int, header: str):
+        """Return a single cell."""
+        column = self.columns.get(header)
+        return "" if column is None else column.get(record)
+
+    def getter(self, header: str):
+        """Return a function that reads the header cell of a row handle."""
+        column = self.columns.get(header)
+        return _missing_cell if column is None else column.get
+
+    def convert(self, header: str, function):
+        """Replace every cell of a column with function(cell)."""
+        column = self.columns[header]
+        for index in range(self.length):
+            value = column.get(index)
+            converted = function(value)
+            if converted is not value:
+                column.set(index, converted)
+
+    def as_dict(self, record: int) -> dict:
+        """Return the row as a dict."""
+        return {header: column.get(record) for header, column in self.columns.items()}
+
+    def sort(self, key, reverse: bool = False):
+        """Sort the table order, key is called with each row index."""
+        self.order = array("q", sorted(self.order, key=key, reverse=reverse))
+
+    def argsort(self, header: str, descending: bool = False) -> bool:
+        """Sort the table order by a NumPy column with a stable numpy.argsort.
+
+        Returns:
+            bool: False if the column is not a NumPy array, the order is then unchanged
+        """
+        column = self.columns.get(header)
+        if column is None or not isinstance(column.values, getattr(numpy, "ndarray", ())):
+            return False
+        order = numpy.frombuffer(self.order, dtype=numpy.int64)
+        values = column.values[order]
+        if descending:
+            # Reversed argsort of the reversed values keeps equal values in order
+            permutation = len(order) - 1 - numpy.argsort(values[::-1], kind="stable")[::-1]
+        else:
+            permutation = numpy.argsort(values, kind="stable")
+        self.order = array("q")
+        self.order.frombytes(order[permutation].astype(numpy.int64).tobytes())
+        return True
+
+    def iter_cells(self, headers: list[str], records=None, getters=None):
+        """Yield the cells of each row (or of the given row handles), in header order.
+
+        Args:
+            headers (list[str]): Headers of the cells to yield
+            records (Iterable[int], optional): Row handles, defaults to every row
+            getters (dict, optional): Cell getters that replace the columns of some
+                headers, such as preformatted text
+        """
+        getters = [
+            (getters or {}).get(header)
+            or (self.columns[header].get if header in self.columns else _missing_cell)
+            for header in headers
+        ]
+        for index in self.order if records is None else records:
+            yield [getter(index) for getter in getters]
+
+
+class _SpillStore:
+    """Row storage for a Table that spills to temporary files past a memory budget.
+
+    Rows are kept in an in-memory buffer of at most ``budget`` rows. When the buffer
+    is full it is pickled into a run file. Sorting sorts each run on its own and
+    the table order is then a k-way merge of the runs, so memory use stays bounded
+    by the budget no matter how many rows the table holds.
+    """
+
+    __slots__ = ("budget", "directory", "buffer", "runs", "length", "merge")
+
+    # Number of rows pickled together in a run file
+    BATCH_SIZE = 1024
+
+    def __init__(self, budget: int, directory: str | None = None):
+        self.budget = budget
+        self.directory = directory
+        self.buffer: list[dict[str, str | int | float | bool]] = []
+        self.runs: list = []
+        self.length = 0
+        # (key, reverse) if the runs and the buffer are sorted and should be merged
+        self.merge: tuple | None = None
+
+    def __len__(self) -> int:
+        return self.length
+
+    def _write_run(self, rows):
+        """Pickle rows into a new run file and return it."""
+        run = tempfile.TemporaryFile(dir=self.directory)  # pylint: disable=consider-using-with
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.BATCH_SIZE:
+                pickle.dump(batch, run, pickle.HIGHEST_PROTOCOL)
+                batch = []
+        if batch:
+            pickle.dump(batch, run, pickle.HIGHEST_PROTOCOL)
+        return run
+
+    @staticmethod
+    def _read_run(run):
+        """Yield the rows of a run file."""
+        run.seek(0)
+        while True:
+            try:
+                batch = pickle.load(run)
+            except EOFError:
+                return
+            yield from batch
+
+    def append(self, row: dict[str, str | int | float | bool]):
+        """Append a row dict and return its handle."""
+        self.merge = None
+        self.buffer.append(row)
+        self.length += 1
+        if len(self.buffer) >= self.budget:
+            self.runs.append(self._write_run(self.buffer))
+            self.buffer = []
+        return row
+
+    def add_column(self, header: str):  # pylint: disable=unused-argument
+        """Register a new column, rows are dicts so nothing needs to be done."""
+
+    def records(self):
+        """Return an iterator over the rows in table order."""
+        runs = [self._read_run(run) for run in self.runs]
+        if self.merge is not None:
+            key, reverse = self.merge
+            return heapq.merge(*runs, self.buffer, key=key, reverse=reverse)
+        return itertools.chain(*runs, self.buffer)
+
+    get = staticmethod(_RowStore.get)
+    getter = staticmethod(_RowStore.getter)
+    as_dict = staticmethod(_RowStore.as_dict)
+
+    def convert(self, header: str, function):
+        """Replace every cell of a column with function(cell).
+
+        Only the runs with a changed cell are rewritten, a run holds at most
+        budget rows so it is converted in memory.
+        """
+        def convert_rows(rows) -> bool:
+            changed = False
+            for row in rows:
+                value = row.get(header, "")
+                converted = function(value)
+                if converted is not value:
+                    row[header] = converted
+                    changed = True
+            return changed
+
+        runs = []
+        for run in self.runs:
+            rows = list(self._read_run(run))
+            if convert_rows(rows):
+                runs.append(self._write_run(rows))
+                run.close()
+            else:
+                runs.append(run)
+        self.runs = runs
+        convert_rows(self.buffer)
+
+    def sort(self, key, reverse: bool = False):
+        """Sort every run on its own, the table order becomes a merge of the runs.
+
+        Runs that are already in order are not rewritten.
+        """
+        runs = []
+        for run in self.runs:
+            rows = list(self._read_run(run))
+            ordered = sorted(rows, key=key, reverse=reverse)
+            if any(map(operator.is_not, rows, ordered)):
+                runs.append(self._write_run(ordered))
+                run.close()
+            else:
+                runs.append(run)
+        self.runs = runs
+        self.buffer.sort(key=key, reverse=reverse)
+        self.merge = (key, reverse)
+
+    def close(self):
+        """Close the run files and drop every row."""
+        for run in self.runs:
+            run.close()
+        self.runs = []
+        self.buffer = []
+        self.length = 0
+        self.merge = None
+
+    def iter_cells(self, headers: list[str], records=None):
+        """Yield the cells of each row (or of the given row handles), in header order."""
+        for row in self.records() if records is None else records:
+            yield [row.get(header, "") for header in headers]
+
+
+class Table(_Renderable):  # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    """Class to generate markdown tables."""
+
+    __slots__ = (
+        "_headers", "_sort_reverse", "_sort_key", "_custom_map", "_formatters", "_escape",
+        "_align", "_title", "_limit", "_offset", "_total_row_label", "_total_row", "_store",
+        "_column_types", "_aggregates", "_aggregates_stale", "_sort_index",
+        "_sort_index_stamp", "_widths", "_widths_stamp", "_width_formatters", "columnar",
+        "flexible_headers", "key", "memory_budget", "sorted_insert", "spill_dir",
+    )
+
+    def __init__(self, headers: list[str], **kwargs):  # type: ignore
+        """Create a table object
+
+        Args:
+            headers (list[str]): List of headers for the table
+
+        Keyword Args:
+            title (str): Title for the table
+            flexible_headers (bool): If True, allow headers to be added dynamically
+            sort_reverse (bool): If True, sort the table in reverse order
+            sort_key (str): Comma separated headers to sort the table by, prefix a
+                header with "-" to sort it in the opposite direction
+            custom_map (dict): Custom map to remap values in the table
+            limit (int): Only render this many rows, followed by a footer with the
+                number of omitted rows
+            offset (int): Number of rows to skip before the first rendered row
+            sorted_insert (bool): If True, keep the rows ordered by the sort_key as they
+                are added, so rendering does not need to sort the table
+            columnar (bool): If True, store the rows in compact typed columns instead
+                of one dict per row, which uses far less memory for large tables
+            total_row (bool | dict[str, str]): Add a total row below the table, True
+                sums every column, a dict maps headers to one of "sum", "count",
+                "min", "max" or "mean"
+            total_row_label (str): Header of the column that holds the "Total" label,
+                defaults to the first header
+            key (str): Header of a column with unique values, adding a row with an
+                existing key updates that row instead, see upsert, get and delete
+            memory_budget (int): Maximum number of rows kept in memory, the rest are
+                spilled to temporary files and sorted with an external merge sort
+            spill_dir (str): Directory for the spilled rows, defaults to the system
+                temporary directory
+            formatters (dict[str, dict]): Formatter spec per header, with the keys
+                precision (int, digits after the decimal point), thousands (bool or
+                str, thousands separator), date_format (str, strftime format for
+                dates) and escape (bool, overrides the escape of the table)
+            escape (bool): If True, escape pipes and newlines in the headers and cells
+            align (bool): If True, pad the cells so the columns line up in plain text,
+                the width of each column is kept up to date as rows are added
+        """
+        super().__init__()
+        self.headers = headers
+        self.flexible_headers = kwargs.get("flexible_headers", False)
+        self.sort_reverse = kwargs.get("sort_reverse", False)
+        self.sort_key = kwargs.get("sort_key", "")
+        self.custom_map: dict = kwargs.get("custom_map", False)
+        self.formatters: dict[str, dict] = kwargs.get("formatters", {})
+        self.escape: bool = kwargs.get("escape", False)
+        self.title = kwargs.get("title", False)
+        self.limit: int | None = kwargs.get("limit")
+        self.offset: int = kwargs.get("offset", 0)
+        self.sorted_insert = kwargs.get("sorted_insert", False)
+        self.columnar = kwargs.get("columnar", False)
+        self.memory_budget: int | None = kwargs.get("memory_budget")
+        self.spill_dir: str | None = kwargs.get("spill_dir")
+        self.key: str | None = kwargs.get("key")
+        if self.memory_budget and (self.columnar or self.sorted_insert):
+            raise ValueError("memory_budget can not be combined with columnar or sorted_insert")
+        if self.key is not None and (self.columnar or self.memory_budget):
+            raise ValueError("key can not be combined with columnar or memory_budget")
+        if self.key is not None and self.key not in headers:
+            raise ValueError(f"key {self.key} not in headers")
+        self._store: _RowStore | _KeyedStore | _ColumnStore | _SpillStore = self._new_store()
+        self._column_types: dict[str, _ColumnType] = {}
+        self._aggregates: dict[str, _Aggregate] = {}
+        # Set when rows are updated or deleted, the aggregates can not be undone
+        self._aggregates_stale = False
+        # Sort keys of the rows in table order, kept up to date by sorted_insert
+        self._sort_index: list | None = None
+        self._sort_index_stamp = None
+        # Display width of each column for align, and what it was measured with
+        self.align: bool = kwargs.get("align", False)
+        self._widths: dict[str, int] | None = None
+        self._widths_stamp: tuple = ()
+        self._width_formatters: dict = {}
+        self.total_row_label: str = kwargs.get("total_row_label", headers[0] if headers else "")
+        self.total_row = kwargs.get("total_row", False)
+
+    headers = _Tracked()
+    sort_reverse = _Tracked()
+    sort_key = _Tracked()
+    custom_map = _Tracked()
+    formatters = _Tracked()
+    escape = _Tracked()
+    align = _Tracked()
+    title = _Tracked()
+    limit = _Tracked()
+    offset = _Tracked()
+    total_row_label = _Tracked()
+
+    @property
+    def rows(self) -> list[dict[str, str | int | float | bool]]:
+        """Rows of the table, built on the fly when the table is columnar or spilled."""
+        if isinstance(self._store, _RowStore):
+            return self._store.rows
+        return [self._store.as_dict(record) for record in self._store.records()]
+
+    @rows.setter
+    def rows(self, rows: list[dict[str, str | int | float | bool]]):
+        self.invalidate()
+        self._sort_index = None
+        self.close()
+        self._store = self._new_store()
+        if isinstance(self._store, _RowStore):
+            self._store.rows = rows
+        elif isinstance(self._store, _KeyedStore):
+            # Later rows replace earlier rows with the same key
+            self._store._reindex(rows)  # pylint: disable=protected-access
+        else:
+            for row in rows:
+                self._store.append(row)
+        self._rescan()
+
+    def close(self):
+        """Close the temporary files of a table that spills to disk.
+
+        The spilled rows are dropped, so the table is empty afterwards. Tables
+        can also be used as a context manager that closes them on exit.
+        """
+        if isinstance(self._store, _SpillStore):
+            self.invalidate()
+            self._sort_index = None
+            self._aggregates_stale = bool(self._aggregates)
+            self._store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _new_store(self) -> _RowStore | _KeyedStore | _ColumnStore | _SpillStore:
+        """Create an empty storage backend for the table."""
+        if self.key is not None:
+            return _KeyedStore(self.key)
+        if self.memory_budget:
+            return _SpillStore(self.memory_budget, self.spill_dir)
+        if self.columnar:
+            return _ColumnStore(self.headers)
+        return _RowStore()
+
+    def remap(self):
+        """Remap the stored values in the table based on the custom_map.
+
+        Rendering applies the custom_map on the fly without changing the stored
+        values, so this is only needed to make the mapping permanent. The
+        custom_map is cleared afterwards, so the mapping is not applied twice.
+        """
+        self.invalidate()
+        self._sort_index = None
+        for header, value_map in (self.custom_map or {}).items():
+            self._store.convert(header, lambda value, get=value_map.get: get(value, value))
+        self.custom_map = {}
+        self._rescan()
+
+    def _rescan(self):
+        """Infer the column types and recompute the running aggregates from scratch."""
+        self._column_types = {}
+        self._aggregates = self._new_aggregates()
+        self._aggregates_stale = False
+        self._widths = self._new_widths()
+        for record in self._store.records():
+            self._track_row(self._store.as_dict(record))
+
+    def _track_row(self, row: dict[str, str | int | float | bool]):
+        """Narrow the inferred column types and update the aggregates for a new row."""
+        column_types = self._column_types
+        for header, value in row.items():
+            column_type = column_types.get(header)
+            if column_type is None:
+                column_type = column_types[header] = _ColumnType()
+            column_type.update(value)
+        for header, aggregate in self._aggregates.items():
+            aggregate.update(row.get(header, ""))
+        if self._widths is not None:
+            self._track_widths(row)
+
+    def _new_widths(self) -> dict[str, int] | None:
+        """Start measuring the display width of each column, if align is set."""
+        if not self.align:
+            return None
+        self._widths_stamp = (self.custom_map, self.formatters, self.escape)
+        self._width_formatters = dict(zip(self.headers, self._cell_formatters(self.headers)))
+        return dict.fromkeys(self.headers, 0)
+
+    def _track_widths(self, row: dict[str, str | int | float | bool]):
+        """Widen the columns to fit the formatted cells of a new row."""
+        widths = self._widths
+        formatters = self._width_formatters
+        for header, value in row.items():
+            formatter = formatters.get(header)
+            if formatter is None:
+                # A new header, measure everything again when rendering
+                self._widths = None
+                return
+            width = _display_width(formatter(value))
+            if width > widths[header]:  # type: ignore
+                widths[header] = width  # type: ignore
+
+    def invalidate(self):
+        """Drop the cached output and the measured column widths.
+
+        Call it after changing a mutable attribute (such as the custom_map or the
+        rows) in place.
+        """
+        super().invalidate()
+        self._widths = None
+
+    def __getstate__(self):
+        # The width formatters are closures that cannot be pickled, the widths
+        # are measured again when the copy renders
+        state = {
+            slot: getattr(self, slot)
+            for cls in type(self).__mro__
+            for slot in getattr(cls, "__slots__", ())
+            if hasattr(self, slot)
+        }
+        state["_widths"] = None
+        state["_width_formatters"] = {}
+        return None, state
+
+    def _width_trackers(self) -> list:
+        """Return (position, header, formatter) for measuring rows given as tuples.
+
+        Returns:
+            list: Empty if the widths are not tracked
+        """
+        if self._widths is None:
+            return []
+        formatters = self._width_formatters
+        measured = [
+            (position, header, formatters[header])
+            for position, header in enumerate(self.headers)
+            if header in formatters
+        ]
+        if len(measured) != len(self.headers):
+            # A new header, measure everything again when rendering
+            self._widths = None
+            return []
+        return measured
+
+    def _column_widths(self) -> dict[str, int]:
+        """Return the display width of each column, measuring them again only if
+        the formatting options changed or rows were updated or deleted."""
+        stamp = (self.custom_map, self.formatters, self.escape)
+        if self._widths is None or not all(map(operator.is_, stamp, self._widths_stamp)):
+            self._widths = self._new_widths() or {}
+            for record in self._store.records():
+                self._track_widths(self._store.as_dict(record))
+        return self._widths or {}
+
+    def _new_aggregates(self) -> dict[str, "_Aggregate"]:
+        """Create empty running aggregates for the columns of the total row."""
+        if not self.total_row:
+            return {}
+        if isinstance(self.total_row, dict):
+            return {header: _Aggregate() for header in self.total_row}
+        return {header: _Aggregate() for header in self.headers if header != self.total_row_label}
+
+    @property
+    def total_row(self) -> dict[str, str] | bool:
+        """Aggregates shown in the total row, True to sum every column."""
+        return self._total_row
+
+    @total_row.setter
+    def total_row(self, total_row: dict[str, str] | bool):
+        if isinstance(total_row, dict):
+            for header, function in total_row.items():
+                if function not in _Aggregate.FUNCTIONS:
+                    raise ValueError(f"Unknown aggregate {function} for {header}")
+        self._total_row = total_row
+        self.invalidate()
+        self._rescan()
+
+    @classmethod
+    def from_records(
+        cls, records, headers: list[str] | None = None, **kwargs
+    ) -> "Table":
+        """Create a table from an iterable of row dicts.
+
+        Args:
+            records (Iterable[dict[str, str | int | float | bool]]): Rows of the table
+            headers (list[str], optional): Headers of the table, defaults to the keys
+                of the first record
+
+        Keyword Args:
+            Any keyword argument accepted by Table
+        """
+        records = iter(records)
+        first = next(records, None)
+        if headers is None:
+            headers = list(first) if first is not None else []
+        table = cls(list(headers), **kwargs)
+        if first is not None:
+            table.add_rows(itertools.chain([first], records))
+        return table
+
+    @classmethod
+    def from_tuples(cls, headers: list[str], rows, **kwargs) -> "Table":
+        """Create a table from an iterable of value tuples in header order.
+
+        Columnar tables load the values straight into their columns without
+        building a dict for each row.
+
+        Args:
+            headers (list[str]): Headers of the table
+            rows (Iterable[Sequence[str | int | float | bool]]): Rows of the table
+
+        Keyword Args:
+            Any keyword argument accepted by Table
+        """
+        table = cls(list(headers), **kwargs)
+        table.add_tuples(rows)
+        return table
+
+    @classmethod
+    def from_arrays(cls, headers: list[str], columns, **kwargs) -> "Table":
+        """Create a columnar table from one buffer per column.
+
+        The buffers, such as NumPy arrays, array.array or lists, are shared with
+        the table instead of being copied, until the table changes them. With NumPy
+        installed, numeric NumPy columns are formatted in one vectorized call when
+        the whole table is rendered, and sorting by one of them uses numpy.argsort.
+        Without it, the same tables are formatted and sorted cell by cell.
+
+        Args:
+            headers (list[str]): Headers of the table
+            columns (Sequence): One buffer per header, all of the same length
+
+        Keyword Args:
+            Any keyword argument accepted by Table, columnar is always set
+
+        Raises:
+            ValueError: If the number or the lengths of the columns do not match
+        """
+        if len(columns) != len(headers):
+            raise ValueError("There must be one column per header")
+        length = len(columns[0]) if len(columns) else 0
+        if any(len(values) != length for values in columns):
+            raise ValueError("All columns must have the same length")
+        kwargs["columnar"] = True
+        table = cls(list(headers), **kwargs)
+        store = table._store
+        for header, values in zip(headers, columns):
+            column = store.columns[header]  # type: ignore
+            column.values = values
+            column.shared = True
+            table._column_types[header] = _buffer_column_type(values)
+        store.order = array("q", range(length))  # type: ignore
+        store.length = length  # type: ignore
+        widths = table._widths
+        for header, values in zip(headers, columns):
+            aggregate = table._aggregates.get(header)
+            if aggregate is None and widths is None:
+                continue
+            plain = values.tolist() if hasattr(values, "tolist") else values
+            if aggregate is not None:
+                for value in plain:
+                    aggregate.update(value)
+            if widths is not None:
+                formatter = table._width_formatters[header]
+                widths[header] = max(map(_display_width, map(formatter, values)), default=0)
+        return table
+
+    @classmethod
+    def from_csv(cls, source, **kwargs) -> "Table":
+        """Create a table from a CSV file, the first line holds the headers.
+
+        Args:
+            source (str | os.PathLike | TextIO): Path or open file to read
+
+        Keyword Args:
+            delimiter (str): Field delimiter of the file, defaults to ","
+            Any other keyword argument accepted by Table
+        """
+        delimiter = kwargs.pop("delimiter", ",")
+        if hasattr(source, "read"):
+            return cls._from_csv_reader(csv.reader(source, delimiter=delimiter), **kwargs)
+        with open(source, newline="", encoding="utf-8") as file_input:
+            return cls._from_csv_reader(csv.reader(file_input, delimiter=delimiter), **kwargs)
+
+    @classmethod
+    def _from_csv_reader(cls, reader, **kwargs) -> "Table":
+        """Create a table from a csv.reader."""
+        return cls.from_tuples(next(reader, []), reader, **kwargs)
+
+    @classmethod
+    def from_jsonl(cls, source, headers: list[str] | None = None, **kwargs) -> "Table":
+        """Create a table from a JSON Lines file with one object per line.
+
+        Args:
+            source (str | os.PathLike | TextIO): Path or open file to read
+            headers (list[str], optional): Headers of the table, defaults to the keys
+                of the first object
+
+        Keyword Args:
+            Any keyword argument accepted by Table
+        """
+        if hasattr(source, "read"):
+            return cls.from_records(
+                (json.loads(line) for line in source if line.strip()), headers, **kwargs
+            )
+        with open(source, encoding="utf-8") as file_input:
+            return cls.from_records(
+                (json.loads(line) for line in file_input if line.strip()), headers, **kwargs
+            )
+
+    def _check_headers(self, row: dict[str, str | int | float | bool], header_set: set[str]):
+        """Check that the keys of row are headers, adding them if the headers are flexible.
+
+        Args:
+            row (dict[str, str | int | float | bool]): Row to check
+            header_set (set[str]): Set of the current headers, updated in place
+        """
+        for key in row.keys():
+            if key not in header_set:
+                if self.flexible_headers:
+                    self.headers.append(key)
+                    self._store.add_column(key)
+                    header_set.add(key)
+                    if self.total_row is True:
+                        self._aggregates[key] = _Aggregate()
+                else:
+                    raise ValueError(
+                        f"Key {key} not in headers and flexible_headers is False"
+                    )
+
+    def add_rows(self, rows: list[dict[str, str | int | float | bool]]):
+        """Add multiple rows to the table.
+
+        The headers are checked against a set once per batch, and the rows are
+        appended to the storage in bulk.
+
+        Args:
+            rows (list[dict[str, str | int | float | bool]]): List of rows to add
+        """
+        if (self.sorted_insert and self.sort_key) or self.key is not None:
+            for row in rows:
+                self.add_row(row)
+            return
+        self._touch()
+        self._sort_index = None
+        headers = self.headers
+        header_set = set(headers)
+        fill_missing = not isinstance(self._store, _ColumnStore)
+        append = self._store.append
+        for row in rows:
+            if isinstance(row, list):
+                row = self._list_to_row(row)
+            elif not header_set.issuperset(row.keys()):
+                self._check_headers(row, header_set)
+            self._track_row(row)
+            if fill_missing and len(row) < len(headers):
+                for header in headers:
+                    if header not in row:
+                        row[header] = ""
+            append(row)
+
+    def add_tuples(self, rows):  # pylint: disable=too-many-locals
+        """Add multiple rows given as value tuples in header order.
+
+        Args:
+            rows (Iterable[Sequence[str | int | float | bool]]): Rows to add
+        """
+        if (self.sorted_insert and self.sort_key) or not isinstance(self._store, _ColumnStore):
+            headers = self.headers
+            self.add_rows(dict(zip(headers, self._check_length(values))) for values in rows)
+            return
+        self._touch()
+        self._sort_index = None
+        column_types = [self._column_type(header) for header in self.headers]
+        columns = [self._store.columns[header] for header in self.headers]
+        aggregates = [
+            (self.headers.index(header), aggregate)
+            for header, aggregate in self._aggregates.items()
+            if header in self.headers
+        ]
+        measured = self._width_trackers()
+        widths = self._widths
+        append_values = self._store.append_values
+        for values in rows:
+            for column_type, value in zip(column_types, self._check_length(values)):
+                column_type.update(value)
+            for position, aggregate in aggregates:
+                aggregate.update(values[position])
+            for position, header, formatter in measured:
+                width = _display_width(formatter(values[position]))
+                if width > widths[header]:  # type: ignore
+                    widths[header] = width  # type: ignore
+            append_values(columns, values)
+
+    def _check_length(self, values):
+        """Check that a row given as a sequence has a value for every header."""
+        if len(values) != len(self.headers):
+            raise ValueError(
+                f"Row length ({len(values)}) does not match header length ({len(self.headers)})"
+            )
+        return values
+
+    def _list_to_row(self, values: list) -> dict[str, str | int | float | bool]:
+        """Convert a list of values into a row dict, using the headers as keys."""
+        return dict(zip(self.headers, self._check_length(values)))
+
+    def add_row(self, row: dict[str, str | int | float | bool] | list[str]):
+        """Add a row to the table.
+        
+        Args:
+            row (dict[str, str | int | float | bool], list[str]): Row to add
+        """
+
+        # If row is a list, convert it to a dict, using the headers as keys
+        if isinstance(row, list):
+            row = self._list_to_row(row)
+        # If row is a dict, check that all the keys are in the headers, if not, raise error
+        elif isinstance(row, dict):
+            self._check_headers(row, set(self.headers))
+        if self.key is not None and self.key not in row:
+            raise ValueError(f"Row has no value for key {self.key}")
+        self._touch()
+        self._track_row(row)
+        if self.key is not None and self._update(row):
+            return
+        if not isinstance(self._store, _ColumnStore):
+            # Check that all the headers are in the row,
+            # columnar tables store missing cells sparsely instead
+            for header in self.headers:
+                if header not in row.keys():
+                    row[header] = ""
+
+        if self.sorted_insert and self.sort_key and self._insert_sorted(row):
+            return
+        self._store.append(row)
+        self._sort_index = None
+
+    def upsert(self, row: dict[str, str | int | float | bool] | list[str]):
+        """Add a row, or update the row with the same key in place.
+
+        Args:
+            row (dict[str, str | int | float | bool], list[str]): Row to add or update
+        """
+        if self.key is None:
+            raise ValueError("upsert needs a table with a key")
+        self.add_row(row)
+
+    def get(self, key) -> dict[str, str | int | float | bool] | None:
+        """Return the row with key, or None if there is no such row.
+
+        Args:
+            key (str | int | float | bool): Value of the key column
+        """
+        if self.key is None:
+            raise ValueError("get needs a table with a key")
+        return self._store.find(key)  # type: ignore
+
+    def delete(self, key):
+        """Delete the row with key.
+
+        Args:
+            key (str | int | float | bool): Value of the key column
+
+        Raises:
+            KeyError: If there is no row with key
+        """
+        if self.key is None:
+            raise ValueError("delete needs a table with a key")
+        self._store.delete(key)  # type: ignore
+        self.invalidate()
+        self._sort_index = None
+        self._aggregates_stale = bool(self._aggregates)
+        self._widths = None
+
+    def _update(self, row: dict[str, str | int | float | bool]) -> bool:
+        """Update the existing row with the same key as row.
+
+        Returns:
+            bool: False if there is no row with that key yet
+        """
+        existing = self._store.find(row[self.key])  # type: ignore
+        if existing is None:
+            return False
+        existing.update(row)
+        self._sort_index = None
+        self._aggregates_stale = bool(self._aggregates)
+        self._widths = None
+        return True
+
+    def _sort_stamp(self, sort_keys: list[tuple[str, bool]]) -> tuple:
+        """Return the sort configuration the sort index was built for."""
+        return tuple(
+            (header, descending, self._column_type(header).kind)
+            for header, descending in sort_keys
+        )
+
+    def _insert_sorted(self, row: dict[str, str | int | float | bool]) -> bool:
+        """Insert a row at its sorted position using the sort index.
+
+        Returns:
+            bool: False if the index is stale and the row was not inserted
+        """
+        sort_keys = self._parse_sort_key()
+        if self._sort_index is None and not self._store:
+            self._sort_index = []
+            self._sort_index_stamp = self._sort_stamp(sort_keys)
+        if self._sort_index is None or self._sort_index_stamp != self._sort_stamp(sort_keys):
+            return False
+        key, _ = self._sort_key_function(sort_keys, ascending=True)
+        record = self._store.append(row)
+        row_key = key(record)
+        position = bisect_right(self._sort_index, row_key)
+        self._sort_index.insert(position, row_key)
+        self._store.move_last(position)
+        return True
+
+    def sort_table(self, disable_convert: bool = False):
+        """Sort the table by the sort_key."""
+        self._touch()
+        self._sort(disable_convert)
+
+    def _parse_sort_key(
+        self, sort_key: str | None = None, sort_reverse: bool | None = None
+    ) -> list[tuple[str, bool]]:
+        """Split the sort_key into (header, descending) pairs.
+
+        Args:
+            sort_key (str, optional): Sort key to parse instead of the table's
+            sort_reverse (bool, optional): Reverse flag to use instead of the table's
+
+        Raises:
+            ValueError: If the sort_key is not set or names an unknown header
+        """
+        if sort_key is None:
+            sort_key = self.sort_key
+        if sort_reverse is None:
+            sort_reverse = self.sort_reverse
+        if not sort_key:
+            raise ValueError("sort_key not set")
+        sort_keys = []
+        for header in sort_key.split(","):
+            descending = False
+            if header not in self.headers:
+                header = header.strip()
+                if header.startswith("-") and header not in self.headers:
+                    header = header[1:]
+                    descending = True
+                if header not in self.headers:
+                    raise ValueError(f"sort_key {header} not in headers")
+            sort_keys.append((header, descending != bool(sort_reverse)))
+        return sort_keys
+
+    def _sort_key_function(
+        self, sort_keys: list[tuple[str, bool]], disable_convert: bool = False, **kwargs
+    ):
+        """Build the key function and reverse flag for a single sorted() call.
+
+        The key of each column depends on its inferred type, so no trial sorts
+        are needed. If the keys are sorted in different directions, the descending
+        ones are inverted so the whole table can be sorted in ascending order.
+
+        Args:
+            sort_keys (list[tuple[str, bool]]): Parsed sort keys
+            disable_convert (bool): If True, compare the stored values as they are
+
+        Keyword Args:
+            ascending (bool): If True, always invert the descending keys so the
+                reverse flag is False
+
+        Returns:
+            tuple: Key function taking a row handle, and the reverse flag
+        """
+        mixed = kwargs.get("ascending", False) or len(
+            {descending for _, descending in sort_keys}
+        ) > 1
+        key_functions = []
+        for header, descending in sort_keys:
+            getter = self._store.getter(header)
+            kind = "raw" if disable_convert else self._column_type(header).kind
+            key = getter
+            if kind in _SORT_KEY_CONVERTERS:
+                key = _compose(_SORT_KEY_CONVERTERS[kind], key)
+            if mixed and descending:
+                key = _compose(_Descending if kind in ("str", "raw") else operator.neg, key)
+            key_functions.append(key)
+        reverse = not mixed and sort_keys[0][1]
+        if len(key_functions) == 1:
+            return key_functions[0], reverse
+        return lambda record: [key(record) for key in key_functions], reverse
+
+    def _column_type(self, header: str) -> _ColumnType:
+        """Return the inferred type of a column."""
+        column_type = self._column_types.get(header)
+        if column_type is None:
+            column_type = self._column_types[header] = _ColumnType()
+        return column_type
+
+    def _convert_bool_columns(self, sort_keys: list[tuple[str, bool]]):
+        """Store the cells of bool-like sort columns as real bools."""
+        for header, _ in sort_keys:
+            if self._column_type(header).kind == "bool":
+                self._store.convert(header, _to_bool)
+
+    def _is_sorted(self, sort_keys: list[tuple[str, bool]]) -> bool:
+        """Check if sorted_insert has kept the rows in order."""
+        return (
+            self._sort_index is not None
+            and self._sort_index_stamp == self._sort_stamp(sort_keys)
+        )
+
+    def _sort(self, disable_convert: bool = False):
+        """Sort the stored rows without touching the render cache."""
+        sort_keys = self._parse_sort_key()
+        store = self._store
+        if not disable_convert:
+            self._convert_bool_columns(sort_keys)
+            if self._is_sorted(sort_keys):
+                # Rows were inserted in sorted order
+                return
+        self._sort_index = None
+        if (
+            len(sort_keys) == 1
+            and not self.sorted_insert
+            and isinstance(store, _ColumnStore)
+            and self._column_type(sort_keys[0][0]).kind in ("int", "float")
+            and store.argsort(*sort_keys[0])
+        ):
+            return
+        key, reverse = self._sort_key_function(sort_keys, disable_convert)
+        try:
+            store.sort(key=key, reverse=reverse)
+        except (KeyError, ValueError):
+            if disable_convert:
+                raise
+            # The rows were changed in place behind our back, infer the types again
+            self._rescan()
+            key, reverse = self._sort_key_function(sort_keys)
+            store.sort(key=key, reverse=reverse)
+        if self.sorted_insert and not disable_convert:
+            key, _ = self._sort_key_function(sort_keys, ascending=True)
+            self._sort_index = [key(record) for record in store.records()]
+            self._sort_index_stamp = self._sort_stamp(sort_keys)
+
+    def _select_rows(self, limit: int | None, offset: int):
+        """Pick the row handles to render, in order.
+
+        When only part of an unsorted table is rendered, the rows are picked with
+        a heap based top-k selection instead of sorting the whole table.
+
+        Returns:
+            tuple: Iterable of row handles, and the number of rows left after them
+        """
+        store = self._store
+        total = len(store)
+        end = total if limit is None else min(total, offset + limit)
+        if self.sort_key:
+            sort_keys = self._parse_sort_key()
+            if end < total and not self._is_sorted(sort_keys):
+                self._convert_bool_columns(sort_keys)
+                key, reverse = self._sort_key_function(sort_keys)
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                return select(end, store.records(), key=key)[offset:], total - end
+            self._sort()
+        if offset or end < total:
+            return itertools.islice(store.records(), offset, end), total - end
+        return store.records(), 0
+
+    def _iter_chunks(self, **kwargs):
+        """Render the table one chunk at a time.
+
+        Keyword Args:
+            limit (int): Override the limit of the table
+            offset (int): Override the offset of the table
+
+        Yields:
+            str: The title, header and separator lines, then one chunk per row.
+        """
+        records, omitted = self._select_rows(
+            kwargs.get("limit", self.limit), kwargs.get("offset", self.offset)
+        )
+        yield from self._iter_lines(
+            self.title,
+            self.headers,
+            records,
+            omitted,
+            self._total_cells() if self.total_row else None,
+        )
+
+    def _iter_lines(self, title, headers: list[str], records, omitted: int, total_cells=None):
+        """Render the lines of a table, shared with the views of the table.
+
+        Args:
+            title (str): Title of the table
+            headers (list[str]): Headers of the columns to render
+            records (Iterable): Row handles to render, in order
+            omitted (int): Number of rows left out after the rendered ones
+            total_cells (list, optional): Cells of the total row, see _total_cells
+        """
+        if title:
+            yield f"### {title}\n"
+
+        header_cells = list(map(_escape_cell, headers)) if self.escape else headers
+        widths = self._aligned_widths(headers, header_cells, total_cells) if self.align else None
+        if widths is None:
+            yield f"| {' | '.join(header_cells)} |\n"
+            yield f"| {' | '.join(['---' for _ in headers])} |\n"
+        else:
+            yield f"| {' | '.join(map(_call, map(_padder, widths), header_cells))} |\n"
+            yield f"| {' | '.join(['-' * width for width in widths])} |\n"
+        if records is self._store.records() and isinstance(self._store, _ColumnStore):
+            # The whole table is rendered, format NumPy columns in a single call
+            preformatted = self._preformatted(headers)
+            cells = self._store.iter_cells(headers, records, preformatted)  # pylint: disable=too-many-function-args
+        else:
+            preformatted = {}
+            cells = self._store.iter_cells(headers, records)
+        format_row = self._row_formatter(headers, widths=widths, preformatted=preformatted)
+        yield from map(format_row, cells)
+        if total_cells is not None:
+            yield self._row_formatter(self.headers, mapped=False, widths=widths)(total_cells)
+        if omitted:
+            yield f"\n_{omitted} more rows omitted_\n"
+
+    def _aligned_widths(self, headers: list[str], header_cells: list[str], total_cells=None):
+        """Return the padded width of each column for align.
+
+        Args:
+            headers (list[str]): Headers of the columns to render
+            header_cells (list[str]): Header cells as they are rendered
+            total_cells (list, optional): Cells of the total row, see _total_cells
+        """
+        column_widths = self._column_widths()
+        widths = [
+            max(3, _display_width(cell), column_widths.get(header, 0))
+            for header, cell in zip(headers, header_cells)
+        ]
+        if total_cells is not None:
+            formatters = self._cell_formatters(headers, mapped=False)
+            for index, cell in enumerate(map(_call, formatters, total_cells)):
+                widths[index] = max(widths[index], _display_width(cell))
+        return widths
+
+    def _select_records(self, records: list, limit: int | None, offset: int, sort_keys=None):
+        """Order and slice a list of row handles without changing the table.
+
+        Args:
+            records (list): Row handles to pick from, sorted in place if needed
+            limit (int, optional): Maximum number of rows to pick
+            offset (int): Number of rows to skip
+            sort_keys (list[tuple[str, bool]], optional): Parsed sort keys
+
+        Returns:
+            tuple: List of row handles, and the number of rows left after them
+        """
+        total = len(records)
+        end = total if limit is None else min(total, offset + limit)
+        if sort_keys:
+            key, reverse = self._sort_key_function(sort_keys)
+            if end < total:
+                select = heapq.nlargest if reverse else heapq.nsmallest
+                return select(end, records, key=key)[offset:], total - end
+            records.sort(key=key, reverse=reverse)
+        return records[offset:end], total - end
+
+    def view(self, **kwargs) -> "TableView":
+        """Create a lazy view of the table that shares its rows.
+
+        Keyword Args:
+            columns (list[str]): Headers of the columns to show, defaults to all
+            where (Callable[[dict], bool]): Only show the rows the predicate accepts,
+                it is evaluated while the view renders
+            sort_key (str): Sort key of the view, defaults to the table's
+            sort_reverse (bool): Reverse flag of the view, defaults to the table's
+            limit (int): Maximum number of rows to show, defaults to the table's
+            offset (int): Number of rows to skip, defaults to the table's
+            title (str): Title of the view, defaults to the table's
+        """
+        kwargs.setdefault("title", self.title)
+        return TableView(self, **kwargs)
+
+    def group_by(self, column: str) -> dict:
+        """Split the table into one view per distinct value of a column.
+
+        The rows are partitioned in a single pass. The views share the storage,
+        headers, custom_map and sort configuration of the table, so no rows are
+        copied. Views of tables that spill to disk filter the table while they
+        render instead of holding on to their rows.
+
+        Args:
+            column (str): Header of the column to group by
+
+        Returns:
+            dict[str | int | float | bool, TableView]: Views by column value
+        """
+        if column not in self.headers:
+            raise ValueError(f"column {column} not in headers")
+        get = self._store.getter(column)
+        if isinstance(self._store, _SpillStore):
+            values = dict.fromkeys(get(record) for record in self._store.records())
+            return {
+                value: TableView(
+                    self, where=lambda row, value=value: row.get(column, "") == value,
+                    title=str(value)
+                )
+                for value in values
+            }
+        groups: dict = {}
+        for record in self._store.records():
+            value = get(record)
+            group = groups.get(value)
+            if group is None:
+                group = groups[value] = []
+            group.append(record)
+        return {
+            value: TableView(self, records=records, title=str(value))
+            for value, records in groups.items()
+        }
+
+    def _total_cells(self) -> list:
+        """Return the cells of the total row from the running aggregates.
+
+        The cells are formatted like the other cells, without the custom_map.
+        """
+        if self._aggregates_stale:
+            self._rescan()
+        functions = self.total_row if isinstance(self.total_row, dict) else {}
+        cells = []
+        for header in self.headers:
+            aggregate = self._aggregates.get(header)
+            if aggregate is not None:
+                cells.append(aggregate.result(functions.get(header, "sum")))
+            elif header == self.total_row_label:
+                cells.append("Total")
+            else:
+                cells.append("")
+        return cells
+
+    def _preformatted(self, headers: list[str]) -> dict:
+        """Format the numeric NumPy columns with vectorized NumPy calls.
 
-        Keyword Args:
-            level (int): Level of the header
+        Only columns without a custom_map and with at most a precision are
+        formatted this way, the text matches what the cell formatters would produce.
+
+        Returns:
+            dict: Getter of the formatted text by row index, by header
         """
-        self.text = text
-        self.level = level
+        if numpy is None:
+            return {}
+        custom_map = self.custom_map or {}
+        specs = self.formatters or {}
+        getters = {}
+        for header in headers:
+            column = self._store.columns.get(header)  # type: ignore
+            values = None if column is None else column.values
+            spec = specs.get(header, {})
+            if (
+                not isinstance(values, numpy.ndarray)
+                or values.dtype.kind not in "iuf"
+                or header in custom_map
+                or set(spec) - {"precision", "escape"}
+            ):
+                continue
+            precision = spec.get("precision")
+            if precision is None:
+                texts = values.astype(str)
+            else:
+                texts = numpy.char.mod(f"%.{precision}f", values)
+            getters[header] = texts.__getitem__
+        return getters
 
-    def __str__(self):
-        """Return the header as a string."""
-        return "#" * self.level + " " + self.text
+    def _cell_formatters(
+        self, headers: list[str], mapped: bool = True, preformatted=()
+    ) -> list:
+        """Compile the custom_map and formatters into one function per column.
 
-    def __repr__(self):
-        """Return the header as a string."""
-        return "#" * self.level + " " + self.text
+        Every option is resolved here, once per render, so formatting a cell is a
+        single call without any per-cell checks of the options.
 
-class Table:
-    """Class to generate markdown tables."""
+        Args:
+            headers (list[str]): Headers of the columns to format
+            mapped (bool): Whether to apply the custom_map
+            preformatted (Container[str]): Headers of the columns that are already text
 
-    def __init__(self, headers: list[str], **kwargs):  # type: ignore
-        """Create a table object
+        Returns:
+            list: Functions that turn a stored cell into its rendered text
+        """
+        custom_map = (self.custom_map or {}) if mapped else {}
+        specs = self.formatters or {}
+        formatters = []
+        for header in headers:
+            if header in preformatted:
+                formatters.append(str)
+                continue
+            spec = specs.get(header, {})
+            formatter = _value_formatter(spec)
+            if header in custom_map:
+                lookup = custom_map[header].get
+                formatter = _compose(formatter, lambda cell, lookup=lookup: lookup(cell, cell))
+            if spec.get("escape", self.escape):
+                formatter = _compose(_escape_cell, formatter)
+            formatters.append(formatter)
+        return formatters
+
+    def _row_formatter(
+        self, headers: list[str], mapped: bool = True, widths=None, preformatted=()
+    ):
+        """Compile a function that renders the cells of a row into a table line.
 
         Args:
-            headers (list[str]): List of headers for the table
+            headers (list[str]): Headers of the columns to format
+            mapped (bool): Whether to apply the custom_map
+            widths (list[int], optional): Display widths to pad the cells to
+            preformatted (Container[str]): Headers of the columns that are already text
+        """
+        formatters = self._cell_formatters(headers, mapped, preformatted)
+        if widths is not None:
+            formatters = list(map(_compose, map(_padder, widths), formatters))
+        join = " | ".join
+        return lambda cells: f"| {join(map(_call, formatters, cells))} |\n"
+
+    def iter_render(self, **kwargs):
+        """Render the table one chunk at a time.
 
         Keyword Args:
-            title (str): Title for the table
-            flexible_headers (bool): If True, allow headers to be added dynamically
-            sort_reverse (bool): If True, sort the table in reverse order
-            sort_key (str): Key to sort the table by
-            custom_map (dict): Custom map to remap values in the table
+            limit (int): Only render this many rows instead of the table's limit
+            offset (int): Number of rows to skip instead of the table's offset
+
+        Yields:
+            str: The cached output if it is valid, otherwise freshly rendered chunks.
         """
-        self.headers = headers
-        self.rows: list[dict[str, str | int | float | bool]] = []
-        self.flexible_headers = kwargs.get("flexible_headers", False)
-        self.sort_reverse = kwargs.get("sort_reverse", False)
-        self.sort_key = kwargs.get("sort_key", "")
-        self.custom_map: dict = kwargs.get("custom_map", False)
-        self.title = kwargs.get("title", False)
+        if kwargs:
+            yield from self._iter_chunks(**kwargs)
+        else:
+            yield from super().iter_render()
 
-    def remap(self):
-        """Remap values in the table based on the custom_map"""
-        for header, value_map in self.custom_map.items():
-            for row in self.rows:
-                row[header] = value_map.get(row[header], row[header])
+    def get_table(self, **kwargs) -> str:
+        """Generate the table.
 
-    def add_rows(self, rows: list[dict[str, str | int | float | bool]]):
-        """Add multiple rows to the table.
-        
-        Args:
-            rows (list[dict[str, str | int | float | bool]]): List of rows to add
+        Keyword Args:
+            limit (int): Only render this many rows instead of the table's limit
+            offset (int): Number of rows to skip instead of the table's offset
         """
-        for row in rows:
-            self.add_row(row)
+        if kwargs:
+            return "".join(self._iter_chunks(**kwargs))
+        table = self.render()
+        return table
+
+    def __str__(self):
+        return self.get_table()
+
+
+class TableView(_Renderable):  # pylint: disable=too-many-instance-attributes
+    """Lightweight view over the rows of a Table.
+
+    Views hold row handles (or a predicate) instead of copies of the rows, and
+    render through the table they belong to, using its custom_map and, unless
+    overridden, its headers and sort configuration. Rows deleted from the table
+    after the view was created are left out, and the view is empty once the rows
+    of the table are replaced.
+    """
+
+    __slots__ = (
+        "table", "_store", "_records", "_where", "_columns", "_sort_key", "_sort_reverse",
+        "_limit", "_offset", "_title",
+    )
+
+    def __init__(self, table: Table, **kwargs):
+        """Create a view of a table.
 
-    def add_row(self, row: dict[str, str | int | float | bool] | list[str]):
-        """Add a row to the table.
-        
         Args:
-            row (dict[str, str | int | float | bool], list[str]): Row to add
-        """
+            table (Table): Table the view belongs to
 
-        # If row is a list, convert it to a dict, using the headers as keys
-        if isinstance(row, list):
-            if len(row) != len(self.headers):
-                raise ValueError(
-                    f"Row length ({len(row)}) does not match header length ({len(self.headers)})"
-                )
-            row = dict(zip(self.headers, row))
-        # If row is a dict, check that all the keys are in the headers, if not, raise error
-        elif isinstance(row, dict):
-            for key in row.keys():
-                if key not in self.headers:
-                    if self.flexible_headers:
-                        self.headers.append(key)
-                    else:
-                        raise ValueError(
-                            f"Key {key} not in headers and flexible_headers is False"
-                        )
-        # Check that all the headers are in the row
-        for header in self.headers:
-            if header not in row.keys():
-                row[header] = ""
+        Keyword Args:
+            records (list): Row handles of the rows in the view, defaults to the
+                rows of the table when the view renders
+            where (Callable[[dict], bool]): Predicate selecting the rows in the view
+            columns (list[str]): Headers of the columns to show, defaults to all
+            sort_key (str): Sort key of the view, defaults to the table's,
+                an empty string disables sorting
+            sort_reverse (bool): Reverse flag of the view, defaults to the table's
+            limit (int): Maximum number of rows to show, defaults to the table's
+            offset (int): Number of rows to skip, defaults to the table's
+            title (str): Title of the view
+        """
+        super().__init__()
+        self.table = table
+        # Store the row handles belong to
+        self._store = table._store  # pylint: disable=protected-access
+        self._records = kwargs.get("records")
+        self.where = kwargs.get("where")
+        self.columns: list[str] | None = kwargs.get("columns")
+        for column in self.columns or []:
+            if column not in table.headers:
+                raise ValueError(f"column {column} not in headers")
+        self.sort_key: str | None = kwargs.get("sort_key")
+        self.sort_reverse: bool | None = kwargs.get("sort_reverse")
+        self.limit: int | None = kwargs.get("limit")
+        self.offset: int | None = kwargs.get("offset")
+        self.title = kwargs.get("title", False)
 
-        self.rows.append(row)
+    where = _Tracked()
+    columns = _Tracked()
+    sort_key = _Tracked()
+    sort_reverse = _Tracked()
+    limit = _Tracked()
+    offset = _Tracked()
+    title = _Tracked()
 
-    def sort_table(self, disable_convert: bool = False):
-        """Sort the table by the sort_key."""
-        if self.sort_key:
-            # If multiple sort keys are provided, prioritize the first one, then the second, etc.
-            sort_keys = self.sort_key.split(",")
-            for sort_key in sort_keys:
-                if sort_key not in self.headers:
-                    raise ValueError(f"sort_key {sort_key} not in headers")
-                if disable_convert:
-                    self.rows = sorted(
-                        self.rows,
-                        key=lambda row: row.get(sort_key, ""), # pylint: disable=cell-var-from-loop
-                        reverse=self.sort_reverse,
-                    )
-                    break
-                if all( # pylint: disable=use-a-generator
-                    [
-                        row.get(sort_key, "")
-                        in [1, 0, False, True, "False", "True", "false", "true"]
-                        for row in self.rows
-                    ]
-                ):
-                    for row in self.rows:
-                        row[sort_key] = bool(row.get(sort_key, False))
-                    self.rows = sorted(
-                        self.rows,
-                        key=lambda row: bool(row.get(sort_key, False)), # pylint: disable=cell-var-from-loop
-                        reverse=self.sort_reverse,
-                    )
-                    break
+    def _stamp(self):
+        return (self._version, self.table._stamp())  # pylint: disable=protected-access
 
-                try:
-                    self.rows = sorted(
-                        self.rows,
-                        key=lambda row: row.get(sort_key, 0), # pylint: disable=cell-var-from-loop
-                        reverse=self.sort_reverse,
-                    )
-                    break
-                except TypeError:
-                    try:
-                        self.rows = sorted(
-                            self.rows,
-                            key=lambda row: int(row.get(sort_key, 0)), # pylint: disable=cell-var-from-loop
-                            reverse=self.sort_reverse,
-                        )
-                        break
-                    # if type or value error:
-                    except (TypeError, ValueError):
-                        self.rows = sorted(
-                            self.rows,
-                            key=lambda row: str(row.get(sort_key, "")), # pylint: disable=cell-var-from-loop
-                            reverse=self.sort_reverse,
-                        )
-                        break
+    def __len__(self) -> int:
+        return sum(1 for _ in self._iter_records())
 
+    def _iter_records(self):
+        """Yield the row handles of the view, evaluating the predicate lazily."""
+        store = self.table._store  # pylint: disable=protected-access
+        if self._records is None:
+            records = store.records()
+        elif store is not self._store:
+            records = ()
+        elif isinstance(store, _KeyedStore):
+            records = store.live(self._records)
         else:
-            raise ValueError("sort_key not set")
+            records = self._records
+        where = self.where
+        if where is None:
+            return iter(records)
+        return (record for record in records if where(store.as_dict(record)))
 
-    def get_table(self) -> str:
-        """Generate the table."""
-        if self.sort_key:
-            self.sort_table()
-        if self.custom_map:
-            self.remap()
-        table = ""
-        if self.title:
-            table += f"### {self.title}\n"
+    def _iter_chunks(self):
+        table = self.table
+        if table.sort_key:
+            # Show the bool-like sort columns of the table the way the table does
+            table._convert_bool_columns(table._parse_sort_key())  # pylint: disable=protected-access
+        sort_key = table.sort_key if self.sort_key is None else self.sort_key
+        limit = table.limit if self.limit is None else self.limit
+        offset = table.offset if self.offset is None else self.offset
+        if sort_key:
+            records, omitted = table._select_records(  # pylint: disable=protected-access
+                list(self._iter_records()),
+                limit,
+                offset,
+                table._parse_sort_key(sort_key, self.sort_reverse),  # pylint: disable=protected-access
+            )
+        elif limit is None and not offset:
+            records, omitted = self._iter_records(), 0
+        else:
+            iterator = self._iter_records()
+            end = None if limit is None else offset + limit
+            records = list(itertools.islice(iterator, offset, end))
+            omitted = sum(1 for _ in iterator)
+        yield from table._iter_lines(  # pylint: disable=protected-access
+            self.title, self.columns or table.headers, records, omitted
+        )
 
-        table += f"| {' | '.join(self.headers)} |\n"
-        table += f"| {' | '.join(['---' for _ in self.headers])} |\n"
-        for row in self.rows:
-            table += f"| {' | '.join([str(row.get(header, '')) for header in self.headers])} |\n"
-        # if self.total_row:
-        #     total_row = {}
-        #     for header in self.headers:
-        #         if header == self.total_row_label:
-        #             total_row[header] = "Total"
-        #         else:
-        #             try:
-        #                 total_row[header] = sum(
-        #                     [int(row.get(header, 0)) for row in self.rows]
-        #                 )
-        #             except ValueError:
-        #                 total_row[header] = ""
-        #     table += f"| {' | '.join([str(total_row.get(header, '')) for header in self.headers])} |\n" # pylint: disable=line-too-long
-        return table
+    @property
+    def rows(self) -> list[dict[str, str | int | float | bool]]:
+        """Rows of the view, built on the fly."""
+        store = self.table._store  # pylint: disable=protected-access
+        columns = self.columns
+        rows = []
+        for record in self._iter_records():
+            row = store.as_dict(record)
+            if columns is None:
+                rows.append(dict(row))
+            else:
+                rows.append({column: row.get(column, "") for column in columns})
+        return rows
 
     def __str__(self):
-        return self.get_table()
+        return self.render()
+
+    def __repr__(self):
+        return f"TableView(title={self.title}, columns={self.columns}, rows={len(self)})"
 
 
-class Image:
+class Image(_Renderable):
     """Image object for markdown."""
+
+    __slots__ = ("_url", "_title", "_alt", "_width", "_height", "_align", "_caption")
+
     def __init__(self, url: str, **kwargs):
         """Create an image object.
         Args:
@@ -207,6 +2328,7 @@ class Image:
             align (str, optional): Alignment of the image.
             caption (str, optional): Caption for the image.
             """
+        super().__init__()
         self.url = url
         self.title = kwargs.get("title", False)
         self.alt = kwargs.get("alt", url)
@@ -215,6 +2337,16 @@ class Image:
         self.align = kwargs.get("align", False)
         self.caption = kwargs.get("caption", False)
 
+    url = _Tracked()
+    title = _Tracked()
+    alt = _Tracked()
+    width = _Tracked()
+    height = _Tracked()
+    align = _Tracked()
+    caption = _Tracked()
+
+    def _iter_chunks(self):
+        yield str(self)
 
     def html(self):
         """Generate the html for the image."""
@@ -251,8 +2383,11 @@ class Image:
         return return_string
 
 
-class Link:
+class Link(_Renderable):
     """Link object for markdown."""
+
+    __slots__ = ("_url", "_text", "_title", "_new_tab", "_trailing")
+
     def __init__(self, url: str, text: str = "", **kwargs):
         """Create a link object.
 
@@ -262,6 +2397,7 @@ class Link:
             title (str, optional): Title of the link. Defaults to False.
             new_tab (bool, optional): Open link in new tab. Defaults to False.
         """
+        super().__init__()
         self.url = url
         if not text:
             text = url
@@ -270,6 +2406,15 @@ class Link:
         self.new_tab = kwargs.get("new_tab", False)
         self.trailing = kwargs.get("trailing", True)
 
+    url = _Tracked()
+    text = _Tracked()
+    title = _Tracked()
+    new_tab = _Tracked()
+    trailing = _Tracked()
+
+    def _iter_chunks(self):
+        yield str(self)
+
     def __str__(self):
         link = ""
         if self.title:
@@ -286,8 +2431,151 @@ class Link:
         return f"Link(url={self.url}, text={self.text}, title={self.title}, new_tab={self.new_tab})"
 
 
-class List:
+class Placeholder(_Renderable):
+    """Named slot in a section, filled in when a compiled Template is rendered.
+
+    Rendered directly, a placeholder shows up as {{name}}.
+    """
+
+    __slots__ = ("_name",)
+
+    def __init__(self, name: str):
+        """Create a placeholder.
+
+        Args:
+            name (str): Name of the placeholder
+        """
+        super().__init__()
+        self.name = name
+
+    name = _Tracked()
+
+    def _iter_chunks(self):
+        yield str(self)
+
+    def __str__(self):
+        return f"{{{{{self.name}}}}}"
+
+    def __repr__(self):
+        return f"Placeholder(name={self.name})"
+
+
+# Run of backticks that would close a code fence of the same length
+_BACKTICK_RUN = re.compile(rb"`{3,}")
+
+
+class CodeBlock(_Renderable):
+    """Code block backed by a file.
+
+    The file is only read when the code block is rendered. Document.save copies
+    its bytes straight into the output file without decoding them.
+    """
+
+    __slots__ = ("_path", "_language", "_start", "_end")
+
+    def __init__(self, path: str, language: str = "", **kwargs):
+        """Create a code block.
+
+        Args:
+            path (str): Path of the UTF-8 file to include
+            language (str, optional): Language of the code, for syntax highlighting
+
+        Keyword Args:
+            start (int): First line to include, starting from 1
+            end (int): Last line to include
+        """
+        super().__init__()
+        self.path = path
+        self.language = language
+        self.start: int | None = kwargs.get("start")
+        self.end: int | None = kwargs.get("end")
+
+    path = _Tracked()
+    language = _Tracked()
+    start = _Tracked()
+    end = _Tracked()
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return (self._version, None)
+        return (self._version, stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def _skip_lines(view, position: int, count: int) -> int:
+        """Return the offset after count more lines from position."""
+        for _ in range(count):
+            found = view.find(b"\n", position)
+            if found < 0:
+                return len(view)
+            position = found + 1
+        return position
+
+    def _byte_range(self) -> tuple[int, int, bool, str]:
+        """Return the offset and length of the lines to include, whether they
+        end with a newline, and a fence longer than any backtick run in them."""
+        with open(self.path, "rb") as source:
+            size = os.fstat(source.fileno()).st_size
+            if not size:
+                return 0, 0, True, "```"
+            with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                start = self.start or 1
+                begin = self._skip_lines(view, 0, start - 1)
+                if self.end is None:
+                    stop = size
+                else:
+                    stop = self._skip_lines(view, begin, self.end - start + 1)
+                longest = max(
+                    (match.end() - match.start()
+                     for match in _BACKTICK_RUN.finditer(view, begin, stop)),
+                    default=2,
+                )
+                return (
+                    begin,
+                    stop - begin,
+                    stop == begin or view[stop - 1] == ord("\n"),
+                    "`" * (longest + 1),
+                )
+
+    def _iter_parts(self):
+        offset, length, newline, fence = self._byte_range()
+        yield f"{fence}{self.language}\n"
+        if length:
+            yield _FileRange(self.path, offset, length)
+        if not newline:
+            yield "\n"
+        yield f"{fence}\n"
+
+    def _iter_chunks(self):
+        for part in self._iter_parts():
+            if isinstance(part, str):
+                yield part
+            else:
+                yield from part.iter_text()
+
+    def render(self) -> str:
+        """Render the code block to a string.
+
+        The output is not cached, so the content of the file is not kept in memory.
+        """
+        return "".join(self._iter_chunks())
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return (
+            f"CodeBlock(path={self.path}, language={self.language}, "
+            f"start={self.start}, end={self.end})"
+        )
+
+
+class List(_Renderable):
     """List object for markdown."""
+
+    __slots__ = ("_title", "_items", "_ordered")
+
     def __init__(self, items: list[str] | None = None, ordered: bool = False, **kwargs):
         """Create a list.
         
@@ -296,12 +2584,17 @@ class List:
             ordered (bool, optional): Ordered list. Defaults to False.
             title (str, optional): Title of the list. Defaults to False.
             """
+        super().__init__()
         self.title = kwargs.get("title", False)
         if items is None:
             items = []
         self.items = items
         self.ordered = ordered
 
+    title = _Tracked()
+    items = _Tracked()
+    ordered = _Tracked()
+
     def add(self, item: str | Link | Image):
         """Add an item to the list.
 
@@ -310,59 +2603,156 @@ class List:
         """
 
         self.items.append(str(item))
+        self.invalidate()
 
-    def __str__(self):
-        list_output = ""
+    def _iter_chunks(self):
+        """Render the list one chunk at a time.
+
+        Yields:
+            str: The title, then one chunk per item.
+        """
         if self.title:
-            list_output += f"### {self.title}\n"
+            yield f"### {self.title}\n"
         if self.ordered:
             for i, item in enumerate(self.items):
-                list_output += f"{i+1}. {item}\n"
+                yield f"{i+1}. {item}\n"
         else:
             for item in self.items:
-                list_output += f"- {item}\n"
-        return list_output
+                yield f"- {item}\n"
+
+    def __str__(self):
+        return self.render()
 
     def __repr__(self):
         return f"List(title={self.title}, items={self.items}, ordered={self.ordered})"
 
 
-class Section:
-    """Section object for markdown."""
+class Section(_Renderable):
+    """Section object for markdown.
+
+    The content of a section is kept as an ordered list of child nodes, which
+    are only rendered when the section is, so tables added early still show the
+    rows added to them later.
+    """
+
+    __slots__ = ("_title", "children")
+
     def __init__(self, title: Header | str, **kwargs):
         """Create a section.
 
         Args:
             title (str): Title of the section
             content (str, optional): Content of the section.
+            level (int, optional): Level of the title header, if title is a str.
         """
+        super().__init__()
         if isinstance(title, str):
-            title = Header(title, **kwargs)
+            title = Header(title, kwargs.get("level", 1))
         self.title = title
+        self.children: list = []
         self.content = kwargs.get("content", "")
 
-    def add(self, content: str | Table | List | Image | Link | Header):
+    title = _Tracked()
+
+    @property
+    def content(self) -> str:
+        """Content of the section, rendered from its children."""
+        return "".join(self._iter_content())
+
+    @content.setter
+    def content(self, content: str):
+        self.children = [content] if content else []
+        self.invalidate()
+
+    def _stamp(self):
+        return (
+            self._version,
+            self.title._stamp(),  # pylint: disable=protected-access
+            tuple(
+                child._stamp()  # pylint: disable=protected-access
+                for child in self.children
+                if isinstance(child, _Renderable)
+            ),
+        )
+
+    def add(
+        self,
+        content: str | Table | TableView | List | Image | Link | Header | Placeholder | CodeBlock,
+    ):
         """Add content to the section.
 
         Args:
-            content (str | Table | List | Image | Link): Content to add to the section.
+            content (str | Table | TableView | List | Image | Link | Header | Placeholder |
+                CodeBlock): Content to add to the section, rendered when the section is.
         """
-        if self.content:
-            self.content += "\n"
-        self.content += str(content)
         if isinstance(content, str):
-            self.content += "  "
+            content += "  "
+        self.children.append(content)
+        self.invalidate()
+
+    def _iter_content(self, parts: bool = False, template: bool = False):
+        """Render the children of the section, separated by newlines.
+
+        With template set, Placeholder children are yielded as they are instead of
+        being rendered, see Document.compile.
+        """
+        started = False
+        for child in self.children:
+            if started:
+                yield "\n"
+            if template and isinstance(child, Placeholder):
+                chunks = (child,)
+            elif isinstance(child, Node):
+                chunks = child._iter_parts() if parts else child.iter_render()  # pylint: disable=protected-access
+            else:
+                chunks = (str(child),)
+            for chunk in chunks:
+                if chunk:
+                    started = True
+                    yield chunk
+
+    def _iter_chunks(self):
+        """Render the section one chunk at a time.
+
+        Yields:
+            str: The title line, then the content of the section.
+        """
+        yield f"{self.title}\n"
+        yield from self._iter_content()
+        yield "\n"
+
+    def _iter_parts(self):
+        cached = self._cached()
+        if cached is not None:
+            yield cached
+            return
+        yield f"{self.title}\n"
+        yield from self._iter_content(parts=True)
+        yield "\n"
+
+    def _iter_template(self):
+        """Render the section with its Placeholder children left in place."""
+        yield f"{self.title}\n"
+        yield from self._iter_content(template=True)
+        yield "\n"
 
     def __str__(self):
-        return f"{self.title}\n{self.content}\n"
+        return self.render()
 
     def __repr__(self):
         return f"Section(title={self.title}, content={self.content})"
 
 
-class Document:
+def _render_section(section: Section) -> str:
+    """Render a section, used by Document to render sections on an executor."""
+    return section.render()
+
+
+class Document(_Renderable):
     """Class for creating markdown documents."""
 
+    __slots__ = ("_title", "_sections", "_generate_table_of_contents", "filename")
+
     def __init__(
         self,
         title: str,
@@ -380,8 +2770,10 @@ class Document:
             
         Keyword Args:
             sections: Dictionary of sections to add to the document
+            check_filename: Whether to check if the file already exists, defaults to True
 
         """
+        super().__init__()
         self.title = title
         self.sections: dict[str, Section] = kwargs.get("sections", {})
         self.generate_table_of_contents = table_of_contents
@@ -390,7 +2782,7 @@ class Document:
             filename += ".md"
 
         # Check if file already exists
-        if os.path.exists(filename):
+        if kwargs.get("check_filename", True) and os.path.exists(filename):
             if overwrite:
                 # Warn the user that the file will be overwritten
                 print(
@@ -400,6 +2792,16 @@ class Document:
                 raise ValueError(f"File {filename} already exists")
         self.filename = filename
 
+    title = _Tracked()
+    sections = _Tracked()
+    generate_table_of_contents = _Tracked()
+
+    def _stamp(self):
+        return (
+            self._version,
+            tuple(section._stamp() for section in self.sections.values()),  # pylint: disable=protected-access
+        )
+
     def add_section(self, section: Section | str):
         """Add a section to the document.
 
@@ -416,27 +2818,183 @@ class Document:
             )
 
         self.sections[new_section.title.text] = new_section
+        self.invalidate()
         return new_section
 
-    def get_document(self) -> str:
-        """Get the document as a string."""
-        document = f"# {self.title}\n"
+    def _iter_chunks(self, executor=None, parts: bool = False, template: bool = False):
+        """Render the document one chunk at a time.
+
+        Sections are rendered lazily, so only the chunk being written is kept in memory.
+
+        Args:
+            executor (concurrent.futures.Executor, optional): Render the sections
+                concurrently on this executor, in their original order
+            parts (bool): Yield file-backed content as _FileRange parts, see save
+            template (bool): Yield the Placeholder children of the sections as they
+                are, see compile
+
+        Yields:
+            str: Chunks of the document in order.
+        """
+        yield f"# {self.title}\n"
         if self.generate_table_of_contents:
-            document += "## Table of Contents\n"
+            yield "## Table of Contents\n"
             for section in self.sections.values():
-                document += (
+                yield (
                     f"* [{section.title.text}](#{section.title.text.lower().replace(' ', '-')})\n"
                 )
-        for section in self.sections.values():
-            document += str(section)
-        return document
+        if template:
+            for section in self.sections.values():
+                yield from section._iter_template()  # pylint: disable=protected-access
+        elif executor is None:
+            for section in self.sections.values():
+                yield from section._iter_parts() if parts else section.iter_render()  # pylint: disable=protected-access
+        else:
+            yield from executor.map(_render_section, self.sections.values())
+
+    def get_document(self, executor=None) -> str:
+        """Get the document as a string.
+
+        Args:
+            executor (concurrent.futures.Executor, optional): Render the sections
+                concurrently on this executor. Use a ProcessPoolExecutor for CPU-bound
+                tables (the sections must then be picklable) or a ThreadPoolExecutor
+                otherwise. The output is identical to the serial render.
+        """
+        if executor is None or self._cached() is not None:
+            return self.render()
+        stamp = self._stamp()
+        self._cache = "".join(self._iter_chunks(executor))
+        self._cache_stamp = stamp
+        return self._cache
+
+    def save(self, **kwargs) -> bool:
+        """Save the document to a file.
+
+        The document is streamed to disk through a bounded buffer instead of being
+        rendered into a single string first. It is written to a temporary file that
+        atomically replaces the target, and the target is left untouched if its
+        content is already the same.
+
+        Keyword Args:
+            filename (str): Save to this file instead of the current filename
+            buffer_size (int): Number of characters to buffer before each write
+            workers (int): Render the sections in a pool of this many processes
+            executor (concurrent.futures.Executor): Render the sections on this
+                executor instead, see get_document
+            sidecar (bool): Compare against the hash stored in a filename.sha256 file
+                instead of hashing the existing file, and update it after writing
+            skip_unchanged (bool): Leave the file untouched if its content is the
+                same, defaults to True. Without it, CodeBlock files are copied into
+                the output by the kernel with os.sendfile.
+
+        Returns:
+            bool: Whether the file was written
+        """
+        if kwargs.get("filename"):
+            self.filename = kwargs.get("filename", "")
+        buffer_size = kwargs.get("buffer_size", DEFAULT_BUFFER_SIZE)
+        options = {
+            "sidecar": kwargs.get("sidecar", False),
+            "skip_unchanged": kwargs.get("skip_unchanged", True),
+        }
+        executor = kwargs.get("executor")
+        workers = kwargs.get("workers")
+        if executor is None and workers and workers > 1 and self._cached() is None:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                return self._save(pool, buffer_size, **options)
+        return self._save(executor, buffer_size, **options)
+
+    async def asave(self, **kwargs) -> bool:
+        """Save the document to a file without blocking the event loop.
 
-    def save(self, **kwargs):
-        """Save the document to a file."""
+        The document is rendered on the event loop with arender, while the file is
+        written on an executor the same way as save does: through a temporary file
+        that atomically replaces the target, which is left untouched if its content
+        is already the same.
+
+        Keyword Args:
+            filename (str): Save to this file instead of the current filename
+            buffer_size (int): Number of characters to render before each write
+            executor (concurrent.futures.Executor): Executor for the file operations,
+                defaults to the default executor of the event loop
+            sidecar (bool): See save
+            skip_unchanged (bool): See save
+
+        Returns:
+            bool: Whether the file was written
+        """
         if kwargs.get("filename"):
             self.filename = kwargs.get("filename", "")
-        with open(self.filename, "w", encoding="utf-8") as file_output:
-            file_output.write(self.get_document())
+        buffer_size = kwargs.get("buffer_size", DEFAULT_BUFFER_SIZE)
+        options = {
+            "sidecar": kwargs.get("sidecar", False),
+            "skip_unchanged": kwargs.get("skip_unchanged", True),
+        }
+        loop = asyncio.get_running_loop()
+        pieces = self.arender(buffer_size)
+        stopped = threading.Event()
+
+        async def next_piece():
+            return await anext(pieces)
+
+        def chunks():
+            # Pull each piece from the event loop, so only one is held at a time
+            while not stopped.is_set():
+                try:
+                    yield asyncio.run_coroutine_threadsafe(next_piece(), loop).result()
+                except StopAsyncIteration:
+                    return
+            # Raising makes _save_atomic remove the partial file instead of saving it
+            raise RuntimeError("save was stopped")
+
+        future = loop.run_in_executor(
+            kwargs.get("executor"),
+            lambda: _save_atomic(self.filename, chunks(), buffer_size, **options),
+        )
+        try:
+            return await asyncio.shield(future)
+        except BaseException:
+            stopped.set()
+            await asyncio.wait([future])
+            future.exception()
+            raise
+        finally:
+            await pieces.aclose()
+
+    def _iter_parts(self):
+        cached = self._cached()
+        if cached is not None:
+            yield cached
+        else:
+            yield from self._iter_chunks(parts=True)
+
+    def _save(self, executor, buffer_size: int, **kwargs) -> bool:
+        """Stream the document to its file, rendering the sections on the executor."""
+        if executor is None or self._cached() is not None:
+            chunks = self._iter_parts()
+        else:
+            chunks = self._iter_chunks(executor)
+        return _save_atomic(self.filename, chunks, buffer_size, **kwargs)
+
+    def compile(self) -> "Template":
+        """Compile the document into a template.
+
+        The static text around the Placeholder children of the sections is rendered
+        once, so filling the template only renders the values of the placeholders.
+        """
+        fragments: list[str] = []
+        names: list[str] = []
+        buffer: list[str] = []
+        for chunk in self._iter_chunks(template=True):
+            if isinstance(chunk, Placeholder):
+                fragments.append("".join(buffer))
+                buffer.clear()
+                names.append(chunk.name)
+            else:
+                buffer.append(chunk)
+        fragments.append("".join(buffer))
+        return Template(fragments, names)
 
     def __str__(self):
         return self.get_document()
@@ -444,3 +3002,253 @@ class Document:
     def __repr__(self):
         return f"""Document(title={self.title}, filename={self.filename},
          sections={self.sections}, table_of_contents={self.generate_table_of_contents})"""
+
+
+def _find_unfenced(pattern: re.Pattern, view, position: int) -> re.Match | None:
+    """Find the first match of pattern outside fenced code blocks.
+
+    The pattern must have a fence group that matches the fence lines and an info
+    group with the rest of the line. As in CommonMark, a fence is only closed by a
+    line of the same character that is at least as long and has no info string.
+    """
+    fence = None
+    for match in pattern.finditer(view, position):
+        marker = match.group("fence")
+        if marker:
+            if fence is None:
+                fence = marker
+            elif (
+                marker[0] == fence[0]
+                and len(marker) >= len(fence)
+                and not match.group("info").strip()
+            ):
+                fence = None
+        elif fence is None:
+            return match
+    return None
+
+
+def _section_span(view, title: Header) -> tuple[int, int] | None:
+    """Return the start and end offsets of the section with the given title.
+
+    Args:
+        view (bytes | mmap.mmap): Content of a markdown file
+        title (Header): Title of the section
+
+    Returns:
+        tuple[int, int]: Offsets of the section, or None if it is not found
+    """
+    fence = rb"^ {0,3}(?P<fence>`{3,}|~{3,})(?P<info>.*)$"
+    heading = re.escape(str(title).encode("utf-8"))
+    match = _find_unfenced(re.compile(fence + rb"|^" + heading + rb"[ \t]*\r?$", re.M), view, 0)
+    if match is None:
+        return None
+    start = match.start()
+    match = _find_unfenced(
+        re.compile(fence + rb"|^#{1,%d}[ \t]" % title.level, re.M), view, match.end()
+    )
+    return start, len(view) if match is None else match.start()
+
+
+def patch_section(filename: str, section: Section, **kwargs) -> bool:
+    """Replace a single section of an existing markdown file.
+
+    The file is memory-mapped and scanned for the header of the section, skipping
+    fenced code blocks. The section ends at the next header of the same or a higher
+    level. The head and tail of the file are copied unchanged around the newly
+    rendered section into a temporary file, which then atomically replaces the file.
+
+    Args:
+        filename (str): Markdown file to patch
+        section (Section): Section to write, found by the text and level of its title
+
+    Keyword Args:
+        append (bool): Append the section to the file if it is not found
+
+    Raises:
+        ValueError: If the section is not found and append is not set
+
+    Returns:
+        bool: Whether the file was written
+    """
+    data = section.render().encode("utf-8")
+    temporary = _temporary_path(filename)
+    try:
+        with open(filename, "rb") as file_input:
+            size = os.fstat(file_input.fileno()).st_size
+            with (
+                mmap.mmap(file_input.fileno(), 0, access=mmap.ACCESS_READ)
+                if size
+                else memoryview(b"")
+            ) as view:
+                span = _section_span(view, section.title)
+                if span is not None:
+                    start, end = span
+                elif kwargs.get("append", False):
+                    start = end = size
+                    if size and view[size - 1:size] != b"\n":
+                        data = b"\n" + data
+                else:
+                    raise ValueError(f"Section {section.title.text} not found in {filename}")
+                if view[start:end] == data:
+                    return False
+                with memoryview(view) as buffer, open(temporary, "xb") as file_output:
+                    file_output.write(buffer[:start])
+                    file_output.write(data)
+                    file_output.write(buffer[end:])
+        os.chmod(temporary, os.stat(filename).st_mode & 0o7777)
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    return True
+
+
+def _build_document(spec: dict) -> Document:
+    """Build a document from a spec, see render_many."""
+    document = Document(
+        spec["title"],
+        spec["filename"],
+        table_of_contents=spec.get("table_of_contents", False),
+        check_filename=False,
+    )
+    for title, contents in spec.get("sections", {}).items():
+        section = document.add_section(title)
+        if isinstance(contents, (str, Node)):
+            contents = [contents]
+        for content in contents:
+            section.add(content)
+    return document
+
+
+def _render_document(spec: Document | dict) -> tuple[str, bytes]:
+    """Render a document or document spec, used by render_many on its workers."""
+    document = _build_document(spec) if isinstance(spec, dict) else spec
+    return document.filename, document.render().encode("utf-8")
+
+
+def render_many(specs, **kwargs) -> dict:
+    """Render and save many documents on a pool of workers.
+
+    Documents are rendered by the workers and written by the calling process. At
+    most max_pending documents are in flight at once, so a slow disk holds back
+    the workers instead of filling memory with rendered documents.
+
+    Args:
+        specs (Iterable[Document | dict]): Documents to save, or dicts with the
+            title, filename, sections (dict of section title to content or list of
+            contents) and table_of_contents of each document, which are then built
+            by the workers
+
+    Keyword Args:
+        workers (int): Number of worker processes, defaults to the number of CPUs,
+            0 or 1 renders in the calling process
+        executor (concurrent.futures.Executor): Render on this executor instead
+        max_pending (int): Maximum number of documents in flight, defaults to
+            twice the number of workers
+        overwrite (bool): Whether to overwrite existing files, defaults to False
+
+    Raises:
+        ValueError: If a file already exists and overwrite is not set
+
+    Returns:
+        dict: Number of documents and bytes written, seconds taken, and the
+            documents_per_second and bytes_per_second throughput
+    """
+    mode = "wb" if kwargs.get("overwrite", False) else "xb"
+    stats = {"documents": 0, "bytes": 0}
+
+    def write(filename: str, data: bytes):
+        try:
+            with open(filename, mode) as file_output:
+                file_output.write(data)
+        except FileExistsError as error:
+            raise ValueError(f"File {filename} already exists") from error
+        stats["documents"] += 1
+        stats["bytes"] += len(data)
+
+    start = time.perf_counter()
+    executor = kwargs.get("executor")
+    workers = kwargs.get("workers", os.cpu_count() or 1)
+    if executor is None and workers <= 1:
+        for spec in specs:
+            write(*_render_document(spec))
+    else:
+        pool = executor if executor is not None else ProcessPoolExecutor(max_workers=workers)
+        max_pending = kwargs.get("max_pending", 2 * (workers or 1))
+        try:
+            pending: set = set()
+            for spec in specs:
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(*future.result())
+                pending.add(pool.submit(_render_document, spec))
+            for future in wait(pending).done:
+                write(*future.result())
+        finally:
+            if executor is None:
+                pool.shutdown(cancel_futures=True)
+    seconds = time.perf_counter() - start
+    stats["seconds"] = seconds
+    stats["documents_per_second"] = stats["documents"] / seconds if seconds else 0.0
+    stats["bytes_per_second"] = stats["bytes"] / seconds if seconds else 0.0
+    return stats
+
+
+class Template:
+    """Document compiled by Document.compile, with pre-rendered static text."""
+
+    __slots__ = ("fragments", "names")
+
+    def __init__(self, fragments: list[str], names: list[str]):
+        """Create a template.
+
+        Args:
+            fragments (list[str]): Static text before, between and after the placeholders
+            names (list[str]): Names of the placeholders, in order
+        """
+        self.fragments = fragments
+        self.names = names
+
+    def iter_render(self, values: dict):
+        """Render the template one chunk at a time.
+
+        Args:
+            values (dict[str, str | Node]): Value of each placeholder
+
+        Raises:
+            ValueError: If a placeholder has no value
+        """
+        fragments = self.fragments
+        yield fragments[0]
+        for index, name in enumerate(self.names, 1):
+            if name not in values:
+                raise ValueError(f"placeholder {name} not filled")
+            value = values[name]
+            if isinstance(value, Node):
+                yield from value.iter_render()
+            else:
+                yield str(value)
+            yield fragments[index]
+
+    def render(self, values: dict) -> str:
+        """Render the template to a string, see iter_render."""
+        return "".join(self.iter_render(values))
+
+    def save(self, filename: str, values: dict, **kwargs):
+        """Render the template into a file, see iter_render.
+
+        Keyword Args:
+            buffer_size (int): Number of characters to buffer before each write
+        """
+        with open(filename, "w", encoding="utf-8") as file_output:
+            _write_chunks(
+                file_output,
+                self.iter_render(values),
+                kwargs.get("buffer_size", DEFAULT_BUFFER_SIZE),
+            )
+
+    def __repr__(self):
+        return f"Template(names={self.names})"
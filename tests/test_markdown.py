@@ -1,6 +1,15 @@
+# pylint: disable=too-many-lines
 """
 This file contains the pytest tests for the markdown_helper.py file.
 """
+import array
+import asyncio
+import datetime
+import io
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 try:
     from src import markdown_helper as markdown
@@ -477,3 +486,876 @@ def test_document_save(tmp_path):
     assert (
         filename.read_text() == "# Document 1\n## Section 1\nThis is a paragraph.  \n"
     ), "File contents are incorrect."
+
+
+def test_iter_render():
+    """
+    This function tests the iter_render generators.
+    """
+    table_1 = markdown.Table(["Name", "Value"], title="My Table")
+    table_1.add_rows([{"Name": "First", "Value": 1}, {"Name": "Second", "Value": 2}])
+    chunks = list(table_1.iter_render())
+    assert len(chunks) == 5, "Table should yield one chunk per line."
+    assert "".join(chunks) == table_1.get_table(), "Table chunks are incorrect."
+    list_1 = markdown.List(["item 1", "item 2"], ordered=True, title="my_list")
+    assert list(list_1.iter_render()) == [
+        "### my_list\n", "1. item 1\n", "2. item 2\n"
+    ], "List chunks are incorrect."
+    document_1 = markdown.Document("Document 1", filename="document_1.md")
+    document_1.add_section("Section 1").add(table_1)
+    assert (
+        "".join(document_1.iter_render()) == document_1.get_document()
+    ), "Document chunks are incorrect."
+
+
+def test_document_save_buffered(tmp_path):
+    """
+    This function tests saving a document through a small buffer.
+    """
+    filename = tmp_path / "document_1.md"
+    document_1 = markdown.Document("Document 1", filename=str(filename))
+    for i in range(50):
+        document_1.add_section(f"Section {i}").add(f"Paragraph {i}")
+    document_1.save(buffer_size=16)
+    assert filename.read_text() == str(document_1), "File contents are incorrect."
+
+
+def test_table_columnar():
+    """
+    This function tests the columnar storage of the markdown.Table class.
+    """
+    for sort_key in ["Value", "Name", "Flag"]:
+        tables = [
+            markdown.Table(
+                ["Name", "Value", "Flag"], sort_key=sort_key, flexible_headers=True,
+                custom_map={"Name": {"First": "1st"}}, columnar=columnar
+            )
+            for columnar in (False, True)
+        ]
+        for table in tables:
+            table.add_row({"Name": "First", "Value": 1.5, "Flag": 1})
+            table.add_row(["Second", 2, 0])
+            table.add_rows([{"Name": "Third", "Value": -3, "Extra": "x"}, {"Name": "Fourth"}])
+        assert str(tables[0]) == str(tables[1]), "Columnar table output is incorrect."
+    assert tables[1].rows == [
+        {"Name": "Third", "Value": -3, "Flag": "", "Extra": "x"},
+        {"Name": "Fourth", "Value": "", "Flag": "", "Extra": ""},
+        {"Name": "Second", "Value": 2, "Flag": 0, "Extra": ""},
+        {"Name": "First", "Value": 1.5, "Flag": 1, "Extra": ""},
+    ], "Columnar table rows are incorrect."
+
+
+def test_table_columnar_typed():
+    """
+    This function tests that columnar tables keep numbers in typed arrays.
+    """
+    table_1 = markdown.Table(["Int", "Float", "Text"], columnar=True)
+    table_1.add_rows([{"Int": i, "Float": i / 2, "Text": str(i)} for i in range(100)])
+    columns = table_1._store.columns  # pylint: disable=protected-access
+    assert columns["Int"].values.typecode == "q", "Int column is not typed."
+    assert columns["Float"].values.typecode == "d", "Float column is not typed."
+    assert isinstance(columns["Text"].values, list), "Text column should be a list."
+    table_1.add_row({"Int": "many"})
+    assert table_1.rows[-1] == {"Int": "many", "Float": "", "Text": ""}, "Row is incorrect."
+    assert table_1.rows[3] == {"Int": 3, "Float": 1.5, "Text": "3"}, "Row is incorrect."
+
+
+def test_render_cache():
+    """
+    This function tests that rendered output is cached until something changes.
+    """
+    table_1 = markdown.Table(["Name", "Value"], sort_key="Value")
+    table_1.add_row({"Name": "First", "Value": 2})
+    document_1 = markdown.Document("Document 1", filename="document_1.md")
+    section_1 = document_1.add_section("Section 1")
+    section_1.add("Paragraph")
+    first = str(document_1)
+    assert str(document_1) is first, "Unchanged document should be served from the cache."
+    assert str(table_1) is str(table_1), "Unchanged table should be served from the cache."
+    table_1.add_row({"Name": "Second", "Value": 1})
+    assert str(table_1).endswith("| Second | 1 |\n| First | 2 |\n"), "Table cache is stale."
+    table_1.sort_reverse = True
+    assert str(table_1).endswith("| First | 2 |\n| Second | 1 |\n"), "Table cache is stale."
+    section_1.title.text = "Renamed"
+    assert str(document_1) == "# Document 1\n# Renamed\nParagraph  \n", "Document cache is stale."
+    section_1.add("More")
+    assert str(document_1).endswith("Paragraph  \nMore  \n"), "Document cache is stale."
+    document_1.title = "Document 2"
+    assert str(document_1).startswith("# Document 2\n"), "Document cache is stale."
+
+
+def test_table_remap_render_only():
+    """
+    This function tests that rendering a remapped table does not change its rows.
+    """
+    table_1 = markdown.Table(["Name"], custom_map={"Name": {"a": "b", "b": "c"}})
+    table_1.add_rows([{"Name": "a"}, {"Name": "b"}])
+    expected = "| Name |\n| --- |\n| b |\n| c |\n"
+    assert str(table_1) == expected, "Remapped Table is incorrect."
+    table_1.invalidate()
+    assert str(table_1) == expected, "Remapping should not drift between renders."
+    assert table_1.rows == [{"Name": "a"}, {"Name": "b"}], "Rows should not be remapped."
+    table_1.remap()
+    assert table_1.rows == [{"Name": "b"}, {"Name": "c"}], "Rows were not remapped."
+    assert str(table_1) == expected, "Remapping should not be applied twice."
+
+
+def test_table_multi_sort():
+    """
+    This function tests sorting a table by multiple keys in different directions.
+    """
+    table_1 = markdown.Table(["Team", "Score", "Name"], sort_key="Team,-Score,Name")
+    table_1.add_rows([
+        {"Team": "b", "Score": 1, "Name": "x"},
+        {"Team": "a", "Score": 2.5, "Name": "y"},
+        {"Team": "a", "Score": 10, "Name": "z"},
+        {"Team": "a", "Score": 10, "Name": "w"},
+    ])
+    assert [row["Name"] for row in table_1.rows] == ["x", "y", "z", "w"], "Rows are incorrect."
+    table_1.sort_table()
+    assert [row["Name"] for row in table_1.rows] == ["w", "z", "y", "x"], "Sort is incorrect."
+    table_1.sort_key = "-Team,Name"
+    table_1.sort_reverse = True
+    table_1.sort_table()
+    assert [row["Name"] for row in table_1.rows] == ["z", "y", "w", "x"], "Sort is incorrect."
+
+
+def test_table_sort_inferred_types():
+    """
+    This function tests that column types are inferred as rows are added.
+    """
+    table_1 = markdown.Table(["Value"], sort_key="Value")
+    table_1.add_rows([{"Value": "10"}, {"Value": 9}, {"Value": ""}])
+    assert table_1._column_type("Value").kind == "int", "Type is incorrect."  # pylint: disable=protected-access
+    table_1.sort_table()
+    assert [row["Value"] for row in table_1.rows] == ["", 9, "10"], "Sort is incorrect."
+    table_1.add_row({"Value": 0.5})
+    assert table_1._column_type("Value").kind == "float", "Type is incorrect."  # pylint: disable=protected-access
+    table_1.add_row({"Value": "many"})
+    table_1.sort_table()
+    assert [row["Value"] for row in table_1.rows] == [
+        "", 0.5, "10", 9, "many"
+    ], "Sort is incorrect."
+
+
+def test_table_sorted_insert(monkeypatch):
+    """
+    This function tests that sorted_insert tables keep their rows in order.
+    """
+    rows = [{"Name": f"row {i}", "Value": (i * 7) % 5, "Flag": i % 2} for i in range(20)]
+    for columnar in (False, True):
+        for sort_key in ("Value", "-Value,Name", "Flag"):
+            table_1 = markdown.Table(["Name", "Value", "Flag"], sort_key=sort_key,
+                                     sort_reverse=True, columnar=columnar)
+            table_2 = markdown.Table(["Name", "Value", "Flag"], sort_key=sort_key,
+                                     sort_reverse=True, columnar=columnar, sorted_insert=True)
+            table_1.add_rows([dict(row) for row in rows[:10]])
+            table_2.add_rows([dict(row) for row in rows[:10]])
+            assert str(table_1) == str(table_2), "Sorted insert table is incorrect."
+            table_1.add_rows([dict(row) for row in rows[10:]])
+            table_2.add_rows([dict(row) for row in rows[10:]])
+            expected = str(table_1)
+            # Rendering must not sort the table again
+            monkeypatch.setattr(type(table_2._store), "sort", None)  # pylint: disable=protected-access
+            assert str(table_2) == expected, "Sorted insert table is incorrect."
+            monkeypatch.undo()
+
+
+def test_table_keyed_sorted_insert(monkeypatch):
+    """
+    This function tests that keyed sorted_insert tables keep their rows in order.
+    """
+    rows = [{"Name": f"row {i}", "Value": (i * 7) % 5} for i in range(20)]
+    table_1 = markdown.Table(["Name", "Value"], sort_key="-Value,Name", key="Name")
+    table_2 = markdown.Table(["Name", "Value"], sort_key="-Value,Name", key="Name",
+                             sorted_insert=True)
+    table_1.add_rows([dict(row) for row in rows[:10]])
+    table_2.add_rows([dict(row) for row in rows[:10]])
+    # Inserting at a sorted position must not rebuild the key index
+    monkeypatch.setattr(type(table_2._store), "_reindex", None)  # pylint: disable=protected-access
+    table_1.add_rows([dict(row) for row in rows[10:]])
+    table_2.add_rows([dict(row) for row in rows[10:]])
+    assert str(table_1) == str(table_2), "Keyed sorted insert table is incorrect."
+    assert table_2.get("row 12") == {"Name": "row 12", "Value": 4}, "Row is incorrect."
+    table_1.delete("row 12")
+    table_2.delete("row 12")
+    table_1.add_row(["row 12", 0])
+    table_2.add_row(["row 12", 0])
+    assert str(table_1) == str(table_2), "Keyed sorted insert table is incorrect."
+    assert len(table_2.rows) == 20, "Rows are incorrect."
+
+def test_table_limit():
+    """
+    This function tests rendering only the top rows of a table.
+    """
+    table_1 = markdown.Table(["Name", "Value"], sort_key="Value", sort_reverse=True, limit=2)
+    table_1.add_rows([{"Name": f"row {i}", "Value": i % 4} for i in range(8)])
+    assert (
+        str(table_1)
+        == "| Name | Value |\n| --- | --- |\n| row 3 | 3 |\n| row 7 | 3 |\n\n_6 more rows omitted_\n"  # pylint: disable=line-too-long
+    ), "Limited Table is incorrect."
+    assert [row["Name"] for row in table_1.rows[:2]] == [
+        "row 0", "row 1"
+    ], "Rendering a limited table should not sort the rows."
+    assert (
+        table_1.get_table(limit=2, offset=5)
+        == "| Name | Value |\n| --- | --- |\n| row 5 | 1 |\n| row 0 | 0 |\n\n_1 more rows omitted_\n"  # pylint: disable=line-too-long
+    ), "Limited Table with offset is incorrect."
+    assert (
+        table_1.get_table(limit=None, offset=6)
+        == "| Name | Value |\n| --- | --- |\n| row 0 | 0 |\n| row 4 | 0 |\n"
+    ), "Table with offset is incorrect."
+
+
+def test_table_bulk_constructors(tmp_path):
+    """
+    This function tests the bulk constructors of the markdown.Table class.
+    """
+    expected = "| Name | Value |\n| --- | --- |\n| First | 1 |\n| Second | 2 |\n"
+    records = [{"Name": "First", "Value": 1}, {"Name": "Second", "Value": 2}]
+    assert str(markdown.Table.from_records(records)) == expected, "from_records is incorrect."
+    for columnar in (False, True):
+        table_1 = markdown.Table.from_tuples(
+            ["Name", "Value"], [("First", 1), ("Second", 2)], columnar=columnar
+        )
+        assert str(table_1) == expected, "from_tuples is incorrect."
+        assert table_1.rows == records, "from_tuples rows are incorrect."
+        with pytest.raises(ValueError):
+            table_1.add_tuples([("Third",)])
+    csv_file = tmp_path / "table.csv"
+    csv_file.write_text("Name;Value\nFirst;1\nSecond;2\n", encoding="utf-8")
+    table_2 = markdown.Table.from_csv(str(csv_file), delimiter=";", sort_key="-Value")
+    assert (
+        str(table_2) == "| Name | Value |\n| --- | --- |\n| Second | 2 |\n| First | 1 |\n"
+    ), "from_csv is incorrect."
+    jsonl_file = io.StringIO('{"Name": "First", "Value": 1}\n\n{"Name": "Second", "Value": 2}\n')
+    assert str(markdown.Table.from_jsonl(jsonl_file)) == expected, "from_jsonl is incorrect."
+    with pytest.raises(ValueError):
+        markdown.Table.from_records(records + [{"Name": "Third", "Extra": 3}])
+
+
+def test_table_spill(tmp_path):
+    """
+    This function tests that tables over their memory budget spill to disk.
+    """
+    rows = [{"Name": f"row {i}", "Value": (i * 7) % 5, "Flag": i % 2} for i in range(25)]
+    for sort_key in ("", "Value", "Flag,-Value"):
+        table_1 = markdown.Table(["Name", "Value", "Flag"], sort_key=sort_key,
+                                 custom_map={"Flag": {True: "yes"}})
+        table_2 = markdown.Table(["Name", "Value", "Flag"], sort_key=sort_key,
+                                 custom_map={"Flag": {True: "yes"}},
+                                 memory_budget=4, spill_dir=str(tmp_path))
+        table_1.add_rows([dict(row) for row in rows])
+        table_2.add_rows([dict(row) for row in rows])
+        assert len(table_2._store.buffer) == 1, "Rows were not spilled."  # pylint: disable=protected-access
+        assert str(table_1) == str(table_2), "Spilled table is incorrect."
+        assert (
+            table_1.get_table(limit=3) == table_2.get_table(limit=3)
+        ), "Limited spilled table is incorrect."
+        assert table_1.rows == table_2.rows, "Spilled rows are incorrect."
+    with pytest.raises(ValueError):
+        markdown.Table(["Name"], memory_budget=4, columnar=True)
+
+
+def test_table_spill_rewrites(tmp_path, monkeypatch):
+    """
+    This function tests that spilled runs are only rewritten when they change.
+    """
+    table_1 = markdown.Table(["Name", "Flag"], sort_key="Flag", memory_budget=4,
+                             spill_dir=str(tmp_path))
+    table_1.add_rows([{"Name": f"row {i}", "Flag": "yes" if i % 3 else "no"} for i in range(20)])
+    expected = str(table_1)
+    writes = []
+    write_run = markdown._SpillStore._write_run  # pylint: disable=protected-access
+    monkeypatch.setattr(
+        markdown._SpillStore, "_write_run",  # pylint: disable=protected-access
+        lambda store, rows: writes.append(rows) or write_run(store, rows),
+    )
+    table_1.invalidate()
+    assert str(table_1) == expected, "Spilled table is incorrect."
+    assert (
+        table_1.get_table(limit=3).splitlines()[:5] == expected.splitlines()[:5]
+    ), "Limited spilled table is incorrect."
+    assert not writes, "Unchanged runs were rewritten."
+
+
+def test_table_spill_close(tmp_path):
+    """
+    This function tests that spilled tables close their temporary files.
+    """
+    rows = [{"Name": f"row {i}", "Value": (i * 7) % 5} for i in range(25)]
+    with markdown.Table(["Name", "Value"], sort_key="Value",
+                        custom_map={"Name": {"row 0": "first"}},
+                        memory_budget=4, spill_dir=str(tmp_path)) as table_1:
+        table_1.add_rows(rows)
+        runs = list(table_1._store.runs)  # pylint: disable=protected-access
+        expected = str(table_1)
+        assert all(run.closed for run in runs), "Sorted runs were not closed."
+        runs = list(table_1._store.runs)  # pylint: disable=protected-access
+        table_1.remap()
+        assert str(table_1) == expected, "Spilled table is incorrect."
+    assert all(run.closed for run in runs), "Runs were not closed."
+    assert not table_1.rows, "Closed table is incorrect."
+
+
+def test_table_total_row():
+    """
+    This function tests the total row of the markdown.Table class.
+    """
+    table_1 = markdown.Table(["Name", "Value", "Price"], total_row=True)
+    table_1.add_rows([{"Name": "First", "Value": 1, "Price": "2.5"}, ["Second", 2, ""]])
+    assert str(table_1).endswith(
+        "| Second | 2 |  |\n| Total | 3 | 2.5 |\n"
+    ), "Total row is incorrect."
+    table_2 = markdown.Table.from_tuples(
+        ["Name", "Value"], [("First", 4), ("Second", 2), ("Third", "n/a")], columnar=True,
+        total_row={"Value": "mean"}, total_row_label="Name", limit=1
+    )
+    assert str(table_2).endswith(
+        "| First | 4 |\n| Total | 3.0 |\n\n_2 more rows omitted_\n"
+    ), "Total row is incorrect."
+    table_2.total_row = {"Name": "count", "Value": "max"}
+    assert str(table_2).endswith("| 3 | 4 |\n\n_2 more rows omitted_\n"), "Total row is incorrect."
+    with pytest.raises(ValueError):
+        table_2.total_row = {"Value": "median"}
+
+
+def test_table_group_by(tmp_path):
+    """
+    This function tests splitting a table into views with group_by.
+    """
+    rows = [
+        {"Team": "b", "Name": "x", "Score": 3},
+        {"Team": "a", "Name": "y", "Score": 1},
+        {"Team": "b", "Name": "z", "Score": 2},
+    ]
+    for kwargs in ({}, {"columnar": True}, {"memory_budget": 2, "spill_dir": str(tmp_path)}):
+        table_1 = markdown.Table(["Team", "Name", "Score"], sort_key="Score",
+                                 custom_map={"Name": {"z": "zed"}}, **kwargs)
+        table_1.add_rows([dict(row) for row in rows])
+        groups = table_1.group_by("Team")
+        assert list(groups) == ["b", "a"], "Groups are incorrect."
+        assert (
+            str(groups["b"])
+            == "### b\n| Team | Name | Score |\n| --- | --- | --- |\n| b | zed | 2 |\n| b | x | 3 |\n"  # pylint: disable=line-too-long
+        ), "Group view is incorrect."
+        assert groups["a"].rows == [rows[1]], "Group rows are incorrect."
+        section_1 = markdown.Section("Teams")
+        section_1.add(groups["a"])
+        assert str(section_1).endswith("| a | y | 1 |\n\n"), "Section with view is incorrect."
+    with pytest.raises(ValueError):
+        table_1.group_by("Missing")
+    table_1 = markdown.Table(["Team", "Name", "Score"], key="Name")
+    table_1.add_rows([dict(row) for row in rows])
+    groups = table_1.group_by("Team")
+    table_1.delete("z")
+    assert groups["b"].rows == [rows[0]], "Deleted row is still in the view."
+    assert len(groups["b"]) == 1, "View length is incorrect."
+    table_1.add_row(["b", "z", 4])
+    assert groups["b"].rows == [rows[0]], "Added row is in the view."
+    table_1.rows = []
+    assert not groups["a"].rows, "Replaced rows are still in the view."
+
+
+def test_table_keyed():
+    """
+    This function tests the key column of the markdown.Table class.
+    """
+    table_1 = markdown.Table(["Host", "Status", "Load"], key="Host", total_row={"Load": "max"})
+    table_1.add_rows([
+        {"Host": "web-1", "Status": "up", "Load": 5},
+        {"Host": "web-2", "Status": "up", "Load": 3},
+    ])
+    table_1.upsert({"Host": "web-1", "Load": 1})
+    table_1.add_row(["web-3", "down", 2])
+    assert table_1.get("web-1") == {"Host": "web-1", "Status": "up", "Load": 1}, "Row is incorrect."
+    assert (
+        str(table_1)
+        == "| Host | Status | Load |\n| --- | --- | --- |\n| web-1 | up | 1 |\n| web-2 | up | 3 |\n| web-3 | down | 2 |\n| Total |  | 3 |\n"  # pylint: disable=line-too-long
+    ), "Keyed table is incorrect."
+    table_1.delete("web-2")
+    assert table_1.get("web-2") is None, "Row was not deleted."
+    assert [row["Host"] for row in table_1.rows] == ["web-1", "web-3"], "Rows are incorrect."
+    assert str(table_1).endswith("| Total |  | 2 |\n"), "Total row is incorrect."
+    with pytest.raises(KeyError):
+        table_1.delete("web-2")
+    with pytest.raises(ValueError):
+        table_1.upsert({"Status": "up"})
+    with pytest.raises(ValueError):
+        table_1.add_row({"Status": "up", "Load": 100})
+    assert str(table_1).endswith("| Total |  | 2 |\n"), "Rejected row was counted."
+    table_1.rows = [{"Host": "web-1", "Load": 1}, {"Host": "web-1", "Load": 2}]
+    assert [row["Load"] for row in table_1.rows] == [2], "Duplicate key was kept."
+    with pytest.raises(ValueError):
+        markdown.Table(["Host"]).upsert({"Host": "web-1"})
+
+
+def test_table_view(tmp_path):
+    """
+    This function tests filtered and projected views with Table.view.
+    """
+    for kwargs in ({}, {"columnar": True}, {"memory_budget": 2, "spill_dir": str(tmp_path)}):
+        table_1 = markdown.Table(["Name", "Age", "City"], title="People", **kwargs)
+        table_1.add_rows([
+            {"Name": "Ann", "Age": 31, "City": "Oslo"},
+            {"Name": "Bob", "Age": 17, "City": "Rome"},
+            {"Name": "Cid", "Age": 45, "City": "Oslo"},
+        ])
+        seen = []
+        view_1 = table_1.view(
+            columns=["Name", "Age"],
+            where=lambda row, seen=seen: seen.append(row["Name"]) or row["Age"] > 18,
+        )
+        assert not seen, "View is not lazy."
+        assert (
+            str(view_1) == "### People\n| Name | Age |\n| --- | --- |\n| Ann | 31 |\n| Cid | 45 |\n"
+        ), "View is incorrect."
+        view_2 = table_1.view(sort_key="-Age", limit=1, title=False, columns=["Name"])
+        assert str(view_2) == "| Name |\n| --- |\n| Cid |\n\n_2 more rows omitted_\n", "Sorted view is incorrect."  # pylint: disable=line-too-long
+        table_1.add_row(["Dan", 50, "Oslo"])
+        assert str(view_2).startswith("| Name |\n| --- |\n| Dan |\n"), "View does not follow the table."  # pylint: disable=line-too-long
+        assert view_1.rows[-1] == {"Name": "Dan", "Age": 50}, "View rows are incorrect."
+        assert [row["Name"] for row in table_1.rows] == ["Ann", "Bob", "Cid", "Dan"], "Table was changed."  # pylint: disable=line-too-long
+    with pytest.raises(ValueError):
+        table_1.view(columns=["Missing"])
+    for kwargs in ({}, {"columnar": True}, {"memory_budget": 2, "spill_dir": str(tmp_path)}):
+        table_2 = markdown.Table(["Name", "Active"], sort_key="Active", **kwargs)
+        table_2.add_rows([{"Name": "Ann", "Active": "true"}, {"Name": "Bob", "Active": "false"}])
+        view_3 = table_2.view(title=False)
+        expected = "| Name | Active |\n| --- | --- |\n| Bob | False |\n| Ann | True |\n"
+        assert str(view_3) == expected, "View of bool-like column is incorrect."
+        assert str(table_2) == expected, "Table of bool-like column is incorrect."
+
+
+def test_section_lazy_content():
+    """
+    This function tests that sections render their content lazily.
+    """
+    table_1 = markdown.Table(["Name"])
+    section_1 = markdown.Section("Section 1", content="Intro")
+    section_1.add(table_1)
+    section_1.add("Outro")
+    assert section_1.children[0] == "Intro", "Children are incorrect."
+    table_1.add_row(["Ann"])
+    assert (
+        str(section_1) == "# Section 1\nIntro\n| Name |\n| --- |\n| Ann |\n\nOutro  \n"
+    ), "Section is incorrect."
+    table_1.add_row(["Bob"])
+    assert "| Bob |" in str(section_1), "Section did not pick up new rows."
+    section_1.content = "Replaced"
+    assert str(section_1) == "# Section 1\nReplaced\n", "Content setter is incorrect."
+    section_2 = markdown.Section("Section 2")
+    for index in range(1000):
+        section_2.add(str(index))
+    assert section_2.content.endswith("998  \n999  "), "Content is incorrect."
+    link_1 = markdown.Link("https://example.com", "Example")
+    image_1 = markdown.Image("logo.png")
+    section_3 = markdown.Section("Section 3")
+    section_3.add(link_1)
+    section_3.add(image_1)
+    assert "(https://example.com)" in str(section_3), "Section is incorrect."
+    link_1.url = "https://example.org"
+    image_1.alt = "Logo"
+    assert (
+        str(section_3) == "# Section 3\n[Example](https://example.org)\n\n![Logo](logo.png)\n\n"
+    ), "Section did not pick up the changed children."
+
+
+def test_render_into():
+    """
+    This function tests rendering nodes into a shared writer.
+    """
+    document_1 = markdown.Document("Title", "render_into_test", overwrite=True)
+    section_1 = document_1.add_section("Section 1")
+    section_1.add(markdown.Link("https://example.com", "Example"))
+    section_1.add(markdown.List(["a", "b"]))
+    writer = io.StringIO()
+    document_1.render_into(writer)
+    assert writer.getvalue() == str(document_1), "Rendered document is incorrect."
+    writer = io.StringIO()
+    markdown.Image("image.png").render_into(writer)
+    assert writer.getvalue() == "![image.png](image.png)\n", "Rendered image is incorrect."
+    for node in (section_1, markdown.Header("Header"), markdown.Table(["Name"])):
+        assert isinstance(node, markdown.Node), "Node base is incorrect."
+        assert not hasattr(node, "__dict__"), "Node has a __dict__."
+
+
+def test_document_parallel(tmp_path):
+    """
+    This function tests rendering the sections of a document concurrently.
+    """
+    filename = tmp_path / "document_1.md"
+    document_1 = markdown.Document("Document 1", filename=str(filename), table_of_contents=True)
+    for i in range(20):
+        table_1 = markdown.Table(["Name", "Value"], sort_key="-Value")
+        table_1.add_rows([{"Name": f"Row {j}", "Value": j * i} for j in range(50)])
+        section_1 = document_1.add_section(f"Section {i}")
+        section_1.add(f"Paragraph {i}")
+        section_1.add(table_1)
+    expected = "".join(document_1._iter_chunks())  # pylint: disable=protected-access
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert document_1.get_document(executor=executor) == expected, "Document is incorrect."
+    document_1.invalidate()
+    document_1.save(workers=2)
+    assert filename.read_text(encoding="utf-8") == expected, "File contents are incorrect."
+
+
+def test_render_many(tmp_path):
+    """
+    This function tests saving many documents with render_many.
+    """
+    specs = [
+        {
+            "title": f"Report {i}",
+            "filename": str(tmp_path / f"report_{i}"),
+            "sections": {"Summary": [f"Customer {i}", markdown.List(["a", "b"])]},
+        }
+        for i in range(20)
+    ]
+    for kwargs in ({"workers": 0}, {"workers": 2, "max_pending": 3}):
+        stats = markdown.render_many(specs, overwrite=True, **kwargs)
+        assert stats["documents"] == 20, "Document count is incorrect."
+        assert stats["bytes"] == sum(
+            (tmp_path / f"report_{i}.md").stat().st_size for i in range(20)
+        ), "Byte count is incorrect."
+        assert stats["documents_per_second"] > 0, "Throughput is incorrect."
+    assert (
+        (tmp_path / "report_3.md").read_text(encoding="utf-8")
+        == "# Report 3\n# Summary\nCustomer 3  \n- a\n- b\n\n"
+    ), "File contents are incorrect."
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        document_1 = markdown.Document("Extra", str(tmp_path / "extra"))
+        stats = markdown.render_many([document_1], executor=executor)
+    assert stats["documents"] == 1, "Document count is incorrect."
+    with pytest.raises(ValueError):
+        markdown.render_many(specs[:1], workers=0)
+
+
+def test_document_template(tmp_path):
+    """
+    This function tests compiling a document into a template.
+    """
+    document_1 = markdown.Document("Report", str(tmp_path / "template"), table_of_contents=True)
+    summary = document_1.add_section("Summary")
+    summary.add("Static text")
+    summary.add(markdown.Placeholder("customer"))
+    document_1.add_section("Data").add(markdown.Placeholder("data"))
+    template = document_1.compile()
+    assert template.names == ["customer", "data"], "Placeholders are incorrect."
+    for customer in ("Ann", "Bob"):
+        table_1 = markdown.Table(["Customer"])
+        table_1.add_row([customer])
+        values = {"customer": customer, "data": table_1}
+        expected_document = markdown.Document("Report", str(tmp_path / customer), table_of_contents=True)  # pylint: disable=line-too-long
+        expected_summary = expected_document.add_section("Summary")
+        expected_summary.add("Static text")
+        expected_summary.add(customer)
+        expected_document.add_section("Data").add(table_1)
+        expected = str(expected_document).replace(f"{customer}  ", customer)
+        assert template.render(values) == expected, "Filled template is incorrect."
+    template.save(str(tmp_path / "filled.md"), values)
+    assert (tmp_path / "filled.md").read_text(encoding="utf-8") == expected, "Saved template is incorrect."  # pylint: disable=line-too-long
+    assert "{{customer}}" in str(document_1), "Placeholder is incorrect."
+    with pytest.raises(ValueError):
+        template.render({"customer": "Ann"})
+    document_2 = markdown.Document("Help", str(tmp_path / "help"))
+    document_2.add_section("Usage").add("Write {{name}} in your template")
+    document_2.sections["Usage"].add(markdown.Placeholder("name"))
+    template = document_2.compile()
+    assert template.names == ["name"], "Literal text was compiled as a placeholder."
+    assert template.render({"name": "Ann"}).endswith(
+        "Write {{name}} in your template  \nAnn\n"
+    ), "Filled template is incorrect."
+
+
+def test_document_async(tmp_path):
+    """
+    This function tests rendering and saving documents with asyncio.
+    """
+    documents = []
+    for i in range(3):
+        document_1 = markdown.Document(f"Document {i}", str(tmp_path / f"document_{i}"))
+        table_1 = markdown.Table(["Row"])
+        table_1.add_rows([{"Row": j} for j in range(200)])
+        document_1.add_section("Section 1").add(table_1)
+        documents.append(document_1)
+
+    async def collect(document):
+        return [piece async for piece in document.arender(buffer_size=100)]
+
+    async def main():
+        pieces = await collect(documents[0])
+        saved = await asyncio.gather(
+            *(document.asave(buffer_size=100) for document in documents)
+        )
+        return pieces, saved
+
+    pieces, saved = asyncio.run(main())
+    assert len(pieces) > 1, "Document was not split into pieces."
+    assert "".join(pieces) == str(documents[0]), "Rendered document is incorrect."
+    assert saved == [True, True, True], "Files were not written."
+    for i, document in enumerate(documents):
+        assert (tmp_path / f"document_{i}.md").read_text(encoding="utf-8") == str(document), "File contents are incorrect."  # pylint: disable=line-too-long
+    modified = os.stat(tmp_path / "document_0.md").st_mtime_ns
+    assert not asyncio.run(documents[0].asave()), "Unchanged file was written."
+    assert os.stat(tmp_path / "document_0.md").st_mtime_ns == modified, "File was touched."
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "document_0.md", "document_1.md", "document_2.md"
+    ], "Temporary file was left behind."
+
+
+def test_document_async_cancel(tmp_path):
+    """
+    This function tests that cancelling asave leaves the file untouched.
+    """
+    filename = tmp_path / "document_1.md"
+    filename.write_text("Original\n", encoding="utf-8")
+    document_1 = markdown.Document("Document 1", str(filename), check_filename=False)
+    table_1 = markdown.Table(["Row"])
+    table_1.add_rows([{"Row": j} for j in range(50000)])
+    document_1.add_section("Section 1").add(table_1)
+
+    async def main():
+        task = asyncio.create_task(document_1.asave(buffer_size=100))
+        while len(list(tmp_path.iterdir())) < 2:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert filename.read_text(encoding="utf-8") == "Original\n", "File was replaced."
+    assert [path.name for path in tmp_path.iterdir()] == ["document_1.md"], "Temporary file was left behind."  # pylint: disable=line-too-long
+
+
+def test_document_save_unchanged(tmp_path):
+    """
+    This function tests that saving an unchanged document leaves the file alone.
+    """
+    filename = tmp_path / "document_1.md"
+    document_1 = markdown.Document("Document 1", filename=str(filename))
+    document_1.add_section("Section 1").add("Paragraph 1")
+    for sidecar in (False, True):
+        assert document_1.save(sidecar=sidecar), "File was not written."
+        os.utime(filename, (0, 0))
+        assert not document_1.save(sidecar=sidecar), "Unchanged file was written."
+        assert filename.stat().st_mtime == 0, "Unchanged file was modified."
+        document_1.add_section(f"Section {sidecar}")
+    assert document_1.save(sidecar=True), "Changed file was not written."
+    assert filename.read_text(encoding="utf-8") == str(document_1), "File contents are incorrect."
+    assert (tmp_path / "document_1.md.sha256").exists(), "Sidecar is missing."
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "document_1.md", "document_1.md.sha256"
+    ], "Temporary file was left behind."
+
+
+def test_patch_section(tmp_path):
+    """
+    This function tests patching a single section of an existing file.
+    """
+    filename = tmp_path / "README.md"
+    filename.write_text(
+        "# Project\nHand-written intro.\n## Status\nold status\n```\n# not a header\n```\n"
+        "### Details\nold details\n## Usage\nHand-written usage.\n",
+        encoding="utf-8",
+    )
+    table_1 = markdown.Table(["Service", "State"])
+    table_1.add_row(["api", "up"])
+    section_1 = markdown.Section("Status", level=2)
+    section_1.add(table_1)
+    assert markdown.patch_section(str(filename), section_1), "File was not written."
+    assert filename.read_text(encoding="utf-8") == (
+        "# Project\nHand-written intro.\n## Status\n| Service | State |\n| --- | --- |\n"
+        "| api | up |\n\n## Usage\nHand-written usage.\n"
+    ), "Patched file is incorrect."
+    assert not markdown.patch_section(str(filename), section_1), "Unchanged file was written."
+    section_2 = markdown.Section("Changelog", level=2, content="Nothing yet.")
+    with pytest.raises(ValueError):
+        markdown.patch_section(str(filename), section_2)
+    assert markdown.patch_section(str(filename), section_2, append=True), "Section was not appended."  # pylint: disable=line-too-long
+    assert filename.read_text(encoding="utf-8").endswith(
+        "Hand-written usage.\n## Changelog\nNothing yet.\n"
+    ), "Appended section is incorrect."
+    assert [path.name for path in tmp_path.iterdir()] == ["README.md"], "Temporary file was left behind."  # pylint: disable=line-too-long
+    source = tmp_path / "example.md"
+    source.write_text("```\n", encoding="utf-8")
+    document_1 = markdown.Document("Document 1", filename=str(tmp_path / "document_1.md"))
+    document_1.add_section("Code").add(markdown.CodeBlock(str(source)))
+    document_1.add_section("Status").add("old status")
+    document_1.save()
+    section_3 = markdown.Section("Status", content="new status")
+    assert markdown.patch_section(document_1.filename, section_3), "File was not written."
+    assert (tmp_path / "document_1.md").read_text(encoding="utf-8").endswith(
+        "````\n```\n````\n\n# Status\nnew status\n"
+    ), "Section after a code block was not patched."
+
+
+def test_code_block(tmp_path, monkeypatch):
+    """
+    This function tests file-backed code blocks.
+    """
+    source = tmp_path / "example.py"
+    source.write_text("import os\n\n\ndef main():\n    print('héllo')", encoding="utf-8")
+    code_block = markdown.CodeBlock(str(source), "python", start=4)
+    assert str(code_block) == "```python\ndef main():\n    print('héllo')\n```\n", "Code block is incorrect."  # pylint: disable=line-too-long
+    code_block.end = 4
+    assert str(code_block) == "```python\ndef main():\n```\n", "Line range is incorrect."
+    fenced = tmp_path / "README.md"
+    fenced.write_text("# Usage\n````sh\n```\n````\n", encoding="utf-8")
+    code_block = markdown.CodeBlock(str(fenced), "markdown")
+    assert (
+        str(code_block) == "`````markdown\n# Usage\n````sh\n```\n````\n`````\n"
+    ), "Code fence is incorrect."
+    code_block.start, code_block.end = 3, 3
+    assert str(code_block) == "````markdown\n```\n````\n", "Code fence is incorrect."
+    filename = tmp_path / "document_1.md"
+    document_1 = markdown.Document("Document 1", filename=str(filename))
+    section_1 = document_1.add_section("Section 1")
+    section_1.add("Source:")
+    section_1.add(markdown.CodeBlock(str(source)))
+    expected = str(document_1)
+    source.write_text("changed\n", encoding="utf-8")
+    assert str(document_1) != expected, "Code block did not follow the file."
+    expected = str(document_1)
+    document_1.invalidate()
+    section_1.invalidate()
+    monkeypatch.setattr(markdown._FileRange, "iter_text", None)  # pylint: disable=protected-access
+    for skip_unchanged in (True, False):
+        filename.unlink(missing_ok=True)
+        assert document_1.save(skip_unchanged=skip_unchanged), "File was not written."
+        assert filename.read_text(encoding="utf-8") == expected, "File contents are incorrect."
+
+
+def test_table_formatters():
+    """
+    This function tests the formatters and escape options of the markdown.Table class.
+    """
+    table_1 = markdown.Table(
+        ["Name", "Amount", "Date"],
+        formatters={
+            "Amount": {"precision": 2, "thousands": True},
+            "Date": {"date_format": "%d.%m.%Y"},
+        },
+        custom_map={"Name": {"a": "A|B"}},
+        escape=True,
+        total_row={"Amount": "sum"},
+        total_row_label="Name",
+    )
+    table_1.add_row(["a", 1234.5, datetime.date(2024, 1, 31)])
+    table_1.add_row(["line\nbreak", 1000000, "unknown"])
+    assert (
+        table_1.get_table()
+        == "| Name | Amount | Date |\n| --- | --- | --- |\n| A\\|B | 1,234.50 | 31.01.2024 |\n| line<br>break | 1,000,000.00 | unknown |\n| Total | 1,001,234.50 |  |\n"  # pylint: disable=line-too-long
+    ), "Formatted table is incorrect."
+    assert table_1.rows[0]["Name"] == "a", "Table rows were changed."
+    table_1.formatters = {"Amount": {"thousands": " ", "escape": False}}
+    assert "| 1 000 000 |" in table_1.get_table(), "Thousands separator is incorrect."
+    table_2 = markdown.Table(["Amount"], formatters={"Amount": {"thousands": " "}})
+    table_2.add_rows([{"Amount": 12345}, {"Amount": "a,b"}, {"Amount": True}])
+    assert (
+        table_2.get_table() == "| Amount |\n| --- |\n| 12 345 |\n| a,b |\n| True |\n"
+    ), "Formatted text or bool cells are incorrect."
+
+
+def test_table_align():
+    """
+    This function tests the aligned output of the markdown.Table class.
+    """
+    table_1 = markdown.Table(
+        ["Service", "Up"], align=True, custom_map={"Up": {True: "✅", False: "❌"}}
+    )
+    table_1.add_row(["api", True])
+    table_1.add_row(["データ", False])
+    assert (
+        table_1.get_table()
+        == "| Service | Up  |\n| ------- | --- |\n| api     | ✅  |\n| データ  | ❌  |\n"
+    ), "Aligned table is incorrect."
+    table_1.add_row(["authentication", True])
+    assert table_1.get_table().splitlines()[1] == "| -------------- | --- |", "Width was not updated."  # pylint: disable=line-too-long
+    table_1.custom_map = {"Up": {True: "up and running"}}
+    assert (
+        table_1.get_table().splitlines()[2] == "| api            | up and running |"
+    ), "Width was not measured again."
+    view_1 = table_1.view(columns=["Up"], where=lambda row: not row["Up"])
+    assert str(view_1) == "| Up             |\n| -------------- |\n| False          |\n", "Aligned view is incorrect."  # pylint: disable=line-too-long
+    for columnar in (False, True):
+        table_2 = markdown.Table.from_tuples(
+            ["Name", "V"], [("alpha", 1), ("b", 22222)], columnar=columnar, align=True
+        )
+        assert (
+            str(table_2) == "| Name  | V     |\n| ----- | ----- |\n| alpha | 1     |\n| b     | 22222 |\n"  # pylint: disable=line-too-long
+        ), "Aligned bulk table is incorrect."
+
+
+def test_table_from_arrays():
+    """
+    This function tests creating tables from column buffers with Table.from_arrays.
+    """
+    names = ["c", "a", "b", "d"]
+    scores = array.array("q", [3, 1, 3, 2])
+    ratios = array.array("d", [0.5, 1.25, 0.1, 2.0])
+    table_1 = markdown.Table.from_arrays(
+        ["Name", "Score", "Ratio"], [names, scores, ratios], sort_key="-Score"
+    )
+    table_2 = markdown.Table.from_tuples(
+        ["Name", "Score", "Ratio"], zip(names, scores, ratios), sort_key="-Score"
+    )
+    assert str(table_1) == str(table_2), "Table from arrays is incorrect."
+    table_1.add_row(["e", 5, 0.0])
+    assert list(scores) == [3, 1, 3, 2], "Shared buffer was changed."
+    assert table_1.rows[-1] == {"Name": "e", "Score": 5, "Ratio": 0.0}, "Added row is incorrect."
+    with pytest.raises(ValueError):
+        markdown.Table.from_arrays(["Name", "Score"], [names, scores[:2]])
+
+
+def test_table_from_numpy_arrays():
+    """
+    This function tests vectorized formatting and sorting of NumPy columns.
+    """
+    numpy = pytest.importorskip("numpy")
+    scores = numpy.array([3, 1, 3, 2, 1])
+    ratios = numpy.array([0.5, 1.25, 0.1, 2.0, 1 / 3])
+    names = ["c", "a", "b", "d", "e"]
+    for sort_key in ("Score", "-Score", "Ratio", "-Ratio"):
+        kwargs = {"sort_key": sort_key, "formatters": {"Ratio": {"precision": 2}}, "total_row": True}  # pylint: disable=line-too-long
+        table_1 = markdown.Table.from_arrays(["Name", "Score", "Ratio"], [names, scores, ratios], **kwargs)  # pylint: disable=line-too-long
+        table_2 = markdown.Table.from_tuples(
+            ["Name", "Score", "Ratio"], zip(names, scores.tolist(), ratios.tolist()), **kwargs
+        )
+        assert str(table_1) == str(table_2), "NumPy table is incorrect."
+        assert table_1.get_table(limit=2) == table_2.get_table(limit=2), "Limited NumPy table is incorrect."  # pylint: disable=line-too-long
+    assert table_1._store.columns["Score"].values is scores, "Buffer was copied."  # pylint: disable=protected-access
+
+
+def test_table_align_invalidate():
+    """
+    This function tests that invalidate measures the aligned columns again.
+    """
+    table_1 = markdown.Table(["X"], align=True, custom_map={"X": {1: "a"}})
+    table_1.add_rows([{"X": 1}, {"X": 2}])
+    assert str(table_1) == "| X   |\n| --- |\n| a   |\n| 2   |\n", "Aligned table is incorrect."
+    table_1.custom_map["X"][1] = "a much longer text"
+    table_1.invalidate()
+    assert (
+        str(table_1) == "| X                  |\n| ------------------ |\n| a much longer text |\n| 2                  |\n"  # pylint: disable=line-too-long
+    ), "Widths were not measured again."
+
+
+def test_table_align_pickle(tmp_path):
+    """
+    This function tests that aligned tables can be saved with worker processes.
+    """
+    filename = tmp_path / "document_1.md"
+    document_1 = markdown.Document("Document 1", filename=str(filename))
+    table_1 = markdown.Table(["X"], align=True, custom_map={"X": {1: "one"}}, escape=True)
+    table_1.add_rows([{"X": 1}, {"X": "a|b"}])
+    document_1.add_section("Section 1").add(table_1)
+    document_1.add_section("Section 2").add("Text")
+    expected = str(document_1)
+    document_1.invalidate()
+    assert document_1.save(workers=2), "File was not written."
+    assert filename.read_text(encoding="utf-8") == expected, "File contents are incorrect."
+    copy_1 = pickle.loads(pickle.dumps(table_1))
+    assert str(copy_1) == str(table_1), "Pickled table is incorrect."
+    copy_1.add_row(["a longer cell"])
+    assert str(copy_1).splitlines()[1] == "| ------------- |", "Width was not updated."